@@ -1,159 +1,109 @@
-import random
-import matplotlib.pyplot as plt
-import numpy as np
 import logging
 
+from maxsat import instrument
+from maxsat.corpus import load_instances
+from maxsat.experiments import calculate_height_distribution, generate_instances
+from maxsat.generator import GENERATOR
+from maxsat.parallel import DEFAULT_CHUNK_SIZE, default_workers
+from maxsat.plots import plot_height_distribution
+from maxsat.rng import resolve_seed
+from maxsat.store import ShardStore
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s:%(message)s')
 
 
-class Configuration:
-    def __init__(self, num_variables, values=None):
-        self.num_variables = num_variables
-        if values is not None:
-            self.values = values
-        else:
-            self.values = {f"x{i + 1}": random.choice([True, False]) for i in range(num_variables)}
-
-    def evaluate_clause(self, clause):
-        literals = clause.replace("(", "").replace(")", "").split(" or ")
-        for literal in literals:
-            literal = literal.strip()
-            if literal.startswith("not "):
-                var = literal[4:].strip()
-                if not self.values.get(var, False):
-                    return True
-            else:
-                if self.values.get(literal, False):
-                    return True
-        return False
-
-    def count_successful_clauses(self, clauses):
-        return sum(self.evaluate_clause(clause) for clause in clauses)
-
-    def generate_neighbors(self):
-        neighbors = []
-        for var in self.values:
-            neighbor_values = self.values.copy()
-            neighbor_values[var] = not neighbor_values[var]
-            neighbor = Configuration(self.num_variables, neighbor_values)
-            neighbors.append(neighbor)
-        return neighbors
-
-
-class Instance:
-    def __init__(self, num_variables, num_clauses, num_vars_in_clause):
-        self.num_variables = num_variables
-        self.num_clauses = num_clauses
-        self.clauses = [self.generate_clause(num_vars_in_clause) for _ in range(num_clauses)]
-
-    def generate_clause(self, num_vars_in_clause):
-        clause_variables = random.sample(range(1, self.num_variables + 1), num_vars_in_clause)
-        clause = [f"x{i}" if random.choice([True, False]) else f"not x{i}" for i in clause_variables]
-        return f"({' or '.join(clause)})"
-
-    def is_local_optimum(self, config, strictly_greater):
-        main_count = config.count_successful_clauses(self.clauses)
-        neighbors = config.generate_neighbors()
-        for neighbor in neighbors:
-            neighbor_count = neighbor.count_successful_clauses(self.clauses)
-            if strictly_greater:
-                if main_count <= neighbor_count:
-                    return False
-            else:
-                if main_count < neighbor_count:
-                    return False
-        return True
-
-    def calculate_local_optima_distribution(self, num_configurations, strictly_greater):
-        local_optima_heights = []
-        for i in range(num_configurations):
-            # Генерируем случайную конфигурацию
-            config = Configuration(self.num_variables)
-            # Проверяем, является ли конфигурация локальным оптимумом
-            is_optimum = self.is_local_optimum(config, strictly_greater)
-            if is_optimum:
-                # Считаем число удовлетворённых клауз
-                height = config.count_successful_clauses(self.clauses)
-                local_optima_heights.append(height)
-            if i % (max(num_configurations // 10, 1)) == 0 and i > 0:
-                logging.info(f"Instance progress: {i}/{num_configurations} configurations checked")
-        logging.info(f"Instance completed: {len(local_optima_heights)} local optima found out of {num_configurations}")
-        return local_optima_heights
-
-
 class Simulation:
-    def __init__(self, num_variables, num_clauses, num_vars_in_clause, num_instances, num_configurations):
+    def __init__(self, num_variables, num_clauses, num_vars_in_clause, num_instances, num_configurations,
+                 backend="numpy", num_workers=1, chunk_size=DEFAULT_CHUNK_SIZE, seed=None, store_directory=None,
+                 corpus_path=None, precision=None, instance_cache=None, strictly_greater=False):
         self.num_variables = num_variables
         self.num_clauses = num_clauses
         self.num_vars_in_clause = num_vars_in_clause
         self.num_instances = num_instances
         self.num_configurations = num_configurations
-        self.instances = [Instance(num_variables, num_clauses, num_vars_in_clause) for _ in range(num_instances)]
-
-    def run(self, strictly_greater):
-        all_local_optima_heights = []
-        total_local_optima = 0  # Добавляем переменную для общего числа локальных оптимумов
-        for idx, instance in enumerate(self.instances):
-            logging.info(f"Starting instance {idx + 1}/{self.num_instances}")
-            local_optima_heights = instance.calculate_local_optima_distribution(
-                self.num_configurations, strictly_greater
-            )
-            all_local_optima_heights.extend(local_optima_heights)
-            total_local_optima += len(local_optima_heights)  # Суммируем количество локальных оптимумов
-            logging.info(f"Instance {idx + 1} completed: {len(local_optima_heights)} local optima found")
-        logging.info(f"Total local optima found: {total_local_optima}")  # Выводим общее количество локальных оптимумов
-        return all_local_optima_heights, total_local_optima  # Возвращаем общее количество локальных оптимумов
-
-    def plot_height_distribution(self, local_optima_heights):
-        # Проверяем, есть ли локальные оптимумы
-        if not local_optima_heights:
-            print("No local optima found.")
-            return
-
-        # Нормализуем высоты (число удовлетворённых клауз)
-        total_clauses = self.num_clauses
-        normalized_heights = [h / total_clauses for h in local_optima_heights]
-
-        # Находим минимальное и максимальное значения
-        min_height = min(normalized_heights)
-        max_height = max(normalized_heights)
-
-        # Добавляем небольшой отступ (padding) для улучшения отображения
-        padding = (max_height - min_height) * 0.05  # 5% от диапазона
-        x_min = max(0, min_height - padding)
-        x_max = min(1, max_height + padding)
-
-        # Вычисляем гистограмму с обновлённым диапазоном
-        num_bins = 50
-        data, bins = np.histogram(normalized_heights, bins=num_bins, range=(x_min, x_max))
-        # Нормализуем частоту
-        data = data / np.sum(data)
-
-        bin_centers = (bins[:-1] + bins[1:]) / 2
+        self.backend = backend
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        self.precision = precision
+        self.strictly_greater = strictly_greater
+        # Результаты каждой единицы работы пишутся на диск; после перезапуска готовые единицы пропускаются.
+        # Продолженный запуск берёт seed из хранилища
+        self.store = None
+        if store_directory is not None:
+            # Случайные инстанции зависят от версии генератора: хранилище другой версии не подойдёт
+            self.store = ShardStore(store_directory, {
+                "experiment": "exp2", "num_variables": num_variables, "num_clauses": num_clauses,
+                "num_vars_in_clause": num_vars_in_clause, "num_instances": num_instances,
+                "num_configurations": num_configurations, "chunk_size": chunk_size, "corpus_path": corpus_path,
+                "precision": precision, "seed": seed, "generator": GENERATOR if corpus_path is None else None,
+                "strictly_greater": strictly_greater,
+            })
+            seed = self.store.seed
+        # Инстанции и каждый блок конфигураций получают свой поток случайных чисел от одного seed,
+        # поэтому результат не зависит от числа процессов
+        self.seed = resolve_seed(seed)
+        if corpus_path is None:
+            self.instances = generate_instances(num_variables, num_clauses, num_vars_in_clause, num_instances,
+                                                self.seed, instance_cache)
+        else:
+            # Готовые инстанции вместо случайных; параметры n, m и число инстанций берутся из них
+            self.instances = list(load_instances(corpus_path))
+            self.num_instances = len(self.instances)
+            self.num_clauses = max(instance.num_clauses for instance in self.instances)
 
-        plt.figure(figsize=(12, 7))
-        plt.bar(bin_centers, data, width=np.diff(bins), alpha=0.7,
-                edgecolor='black', align='center')
+    def run(self):
+        # Единица работы - (инстанция, диапазон конфигураций); в памяти только счётчики по высотам:
+        # height_counts[h] - число локальных оптимумов высоты h
+        height_counts = calculate_height_distribution(
+            self.instances, self.num_configurations, self.strictly_greater,
+            self.backend, self.num_workers, self.chunk_size, self.seed, self.store, self.precision,
+        )
+        return height_counts, int(height_counts.sum())  # Возвращаем общее количество локальных оптимумов
 
-        plt.xlabel('Normalized Number of Satisfied Clauses (Height)', fontsize=14)
-        plt.ylabel('Normalized Frequency of Local Optima', fontsize=14)
-        plt.title('Distribution of Local Optima by Height', fontsize=16)
-        plt.grid(axis='both')
-        plt.show()
+    def plot_height_distribution(self, height_counts):
+        # Высоты нормализуются на число клауз
+        plot_height_distribution(height_counts, self.num_clauses)
 
 
 # Основная программа
-num_variables = 10
-num_clauses = 50
-num_vars_in_clause = 3
-num_of_instances = 100
-num_configurations = 1000000
-
-simulation = Simulation(num_variables, num_clauses, num_vars_in_clause, num_of_instances, num_configurations)
-
-# Расчёт и визуализация распределения по высоте
-logging.info("Starting simulation for Local Optima Distribution by Height")
-local_optima_heights, total_local_optima = simulation.run(strictly_greater=False)  # Получаем общее число локальных оптимумов
-print(f"Total number of local optima found: {total_local_optima}")  # Выводим общее количество локальных оптимумов
-simulation.plot_height_distribution(local_optima_heights)
+if __name__ == '__main__':
+    num_variables = 10
+    num_clauses = 50
+    num_vars_in_clause = 3
+    num_of_instances = 100
+    num_configurations = 1000000
+    # True - считать только строгие локальные оптимумы (все соседи строго ниже)
+    strictly_greater = False
+    # "numpy" или "bitslice" (64 конфигурации в одном слове uint64)
+    backend = "bitslice"
+    num_workers = default_workers()
+    # None - новый seed для каждого запуска (он пишется в лог); число - повторяемый запуск
+    seed = None
+    # Каталог для результатов по единицам работы (None - только в памяти); повторный запуск продолжает с места сбоя
+    store_directory = None
+    # Бинарный корпус, файл DIMACS или каталог файлов DIMACS вместо случайных инстанций (None - сгенерировать)
+    corpus_path = None
+    # Каталог, где инстанции запуска с заданным seed сохраняются и переиспользуются следующими запусками (None - нет)
+    instance_cache = None
+    # Полуширина доверительного интервала для средней высоты оптимумов, при которой выборка инстанции
+    # останавливается (None - всегда num_configurations)
+    precision = None
+    # JSON-отчёт: число вызовов, время по фазам, пропускная способность и пиковая память; вместе с ним
+    # выводится строка прогресса (None - без инструментирования)
+    report_path = None
+
+    if report_path is not None:
+        instrument.enable(progress=True)
+    simulation = Simulation(num_variables, num_clauses, num_vars_in_clause, num_of_instances, num_configurations,
+                            backend, num_workers, seed=seed, store_directory=store_directory,
+                            corpus_path=corpus_path, precision=precision, instance_cache=instance_cache,
+                            strictly_greater=strictly_greater)
+
+    # Расчёт и визуализация распределения по высоте
+    logging.info("Starting simulation for Local Optima Distribution by Height")
+    height_counts, total_local_optima = simulation.run()  # Получаем общее число локальных оптимумов
+    print(f"Total number of local optima found: {total_local_optima}")  # Выводим общее количество локальных оптимумов
+    if report_path is not None:
+        instrument.write_report(report_path, instrument.disable(), experiment="exp2", seed=simulation.seed)
+    simulation.plot_height_distribution(height_counts)
@@ -0,0 +1,84 @@
+"""Shared evaluation code for the MAX-SAT landscape experiments."""
+
+from .batch import BatchResult, batch_heights, evaluate_batch, sample_batches
+from .bitslice import BitslicedInstance
+from .climb import ClimbResult, climb_samples, hill_climb
+from .census import CensusResult, landscape_census
+from .configuration import Configuration, Neighbors
+from .corpus import Corpus, load_instances, write_corpus
+from .dimacs import read_dimacs, read_wcnf, write_dimacs, write_wcnf
+from .distances import DistanceStats, distance_stats, distance_table
+from .family import FamilyResult, InstanceFamily, evaluate_family
+from .generator import InstanceCache, random_instances
+from .flips import FlipEngine, Neighborhood
+from .instance import CompiledInstance, compile_instance, compile_instances, parse_clause
+from .parallel import iter_units, run_units
+from .plateau import PlateauResult, explore_plateau
+from .refine import ratio_curve, refine_ratio
+from .registry import BloomFilter, OptimaRegistry
+from .rng import chunk_rng, instance_rng, random_configurations
+from .sequential import MeanMonitor, ProportionMonitor, SequentialEstimate, clopper_pearson_interval, wilson_interval
+from .store import ShardStore
+from .stream import IntegerHistogram, RunningStats
+from .sweep import Sweep, grid
+from .walks import AutocorrelationEstimate, RandomWalks, random_walk_autocorrelation
+
+__all__ = [
+    "AutocorrelationEstimate",
+    "BatchResult",
+    "BitslicedInstance",
+    "BloomFilter",
+    "CensusResult",
+    "ClimbResult",
+    "CompiledInstance",
+    "Configuration",
+    "Corpus",
+    "DistanceStats",
+    "FamilyResult",
+    "FlipEngine",
+    "InstanceCache",
+    "InstanceFamily",
+    "IntegerHistogram",
+    "MeanMonitor",
+    "Neighborhood",
+    "Neighbors",
+    "OptimaRegistry",
+    "PlateauResult",
+    "ProportionMonitor",
+    "RandomWalks",
+    "RunningStats",
+    "SequentialEstimate",
+    "ShardStore",
+    "Sweep",
+    "batch_heights",
+    "chunk_rng",
+    "climb_samples",
+    "clopper_pearson_interval",
+    "compile_instance",
+    "compile_instances",
+    "distance_stats",
+    "distance_table",
+    "evaluate_batch",
+    "evaluate_family",
+    "explore_plateau",
+    "grid",
+    "hill_climb",
+    "instance_rng",
+    "iter_units",
+    "landscape_census",
+    "load_instances",
+    "parse_clause",
+    "random_configurations",
+    "random_instances",
+    "random_walk_autocorrelation",
+    "ratio_curve",
+    "read_dimacs",
+    "read_wcnf",
+    "refine_ratio",
+    "run_units",
+    "sample_batches",
+    "wilson_interval",
+    "write_corpus",
+    "write_dimacs",
+    "write_wcnf",
+]
@@ -0,0 +1,122 @@
+import numpy as np
+
+from . import instrument
+from .bitslice import BitslicedInstance, configs_per_block
+from .flips import FlipEngine
+from .rng import random_configurations
+
+DEFAULT_MEMORY_BUDGET = 256 * 2 ** 20
+# "numpy" gathers boolean literal tables; "bitslice" packs 64 configurations per uint64 word
+BACKENDS = ("numpy", "bitslice")
+
+
+class BatchResult:
+    def __init__(self, heights, deltas):
+        self.heights = heights
+        # deltas[b, i]: height change of flipping variable i in configuration b (with leading axes,
+        # e.g. the instance of a family, before b)
+        self.deltas = deltas
+        best = deltas.max(axis=-1) if deltas.shape[-1] else np.full(np.shape(heights), -1)
+        self.strict = best < 0
+        self.non_strict = best <= 0
+        self._counts = None
+
+    def __len__(self):
+        return len(self.heights)
+
+    def neighbor_counts(self):
+        # (equal, improving, worsening) neighbors of every configuration, counted together on first use
+        if self._counts is None:
+            equal = np.count_nonzero(self.deltas == 0, axis=-1)
+            improving = np.count_nonzero(self.deltas > 0, axis=-1)
+            self._counts = equal, improving, self.deltas.shape[-1] - equal - improving
+        return self._counts
+
+    @property
+    def equal_neighbors(self):
+        return self.neighbor_counts()[0]
+
+    @property
+    def improving_neighbors(self):
+        return self.neighbor_counts()[1]
+
+    @property
+    def worsening_neighbors(self):
+        return self.neighbor_counts()[2]
+
+    def local_optima(self, strictly_greater):
+        return self.strict if strictly_greater else self.non_strict
+
+    @property
+    def neighbor_heights(self):
+        return self.heights[..., None] + self.deltas
+
+
+def make_evaluator(instance, backend="numpy"):
+    # Both evaluators provide heights(configs) and evaluate_block(configs) -> (heights, deltas)
+    if backend == "numpy":
+        return FlipEngine(instance)
+    if backend == "bitslice":
+        return BitslicedInstance(instance)
+    raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+
+
+def batch_size_for(instance, memory_budget=DEFAULT_MEMORY_BUDGET, backend="numpy"):
+    if backend == "bitslice":
+        return configs_per_block(instance, memory_budget)
+    # Peak bytes per configuration row: literal truth table, clause counts,
+    # per-occurrence gathers (counts, literal truth, gains) and the delta row
+    occurrences = int(np.count_nonzero(instance.literals))
+    row_bytes = (instance.num_clauses * instance.clause_width + 2 * instance.num_clauses
+                 + 6 * occurrences + 5 * instance.num_variables)
+    return max(1, memory_budget // max(row_bytes, 1))
+
+
+def count_evaluations(instance, num_configurations, neighbors=False):
+    # Configurations, clause evaluations (m per configuration) and, with neighbors, flips evaluated
+    recorder = instrument.active()
+    if recorder is not None:
+        recorder.count("configurations_evaluated", num_configurations)
+        recorder.count("clause_evaluations", num_configurations * instance.num_clauses)
+        if neighbors:
+            recorder.count("neighbor_evaluations", num_configurations * instance.num_variables)
+
+
+def evaluate_batch(instance, configs, engine=None, backend="numpy"):
+    # configs: (B, num_variables) bools -> heights, all flip deltas and optimum masks
+    if engine is None:
+        engine = make_evaluator(instance, backend)
+    count_evaluations(instance, len(configs), neighbors=True)
+    with instrument.phase("evaluation"):
+        heights, deltas = engine.evaluate_block(np.asarray(configs, dtype=bool))
+    return BatchResult(heights, deltas)
+
+
+def batch_heights(instance, configs, engine=None, backend="numpy"):
+    if engine is None:
+        engine = make_evaluator(instance, backend)
+    count_evaluations(instance, len(configs))
+    with instrument.phase("evaluation"):
+        return engine.heights(np.asarray(configs, dtype=bool))
+
+
+def evaluate_blocks(instance, configs, memory_budget=DEFAULT_MEMORY_BUDGET, backend="numpy"):
+    engine = make_evaluator(instance, backend)
+    batch_size = batch_size_for(instance, memory_budget, backend)
+    for start in range(0, len(configs), batch_size):
+        yield evaluate_batch(instance, configs[start:start + batch_size], engine)
+
+
+def sample_batches(instance, num_configurations, rng=None, memory_budget=DEFAULT_MEMORY_BUDGET, backend="numpy",
+                   batch_size=None):
+    # Uniform random configurations, drawn and evaluated one memory-bounded block at a time;
+    # batch_size caps the block further (sequential sampling looks at the data after every block)
+    if rng is None:
+        rng = np.random.default_rng()
+    engine = make_evaluator(instance, backend)
+    memory_batch_size = batch_size_for(instance, memory_budget, backend)
+    batch_size = memory_batch_size if batch_size is None else min(batch_size, memory_batch_size)
+    for start in range(0, num_configurations, batch_size):
+        size = min(batch_size, num_configurations - start)
+        configs = random_configurations(rng, size, instance.num_variables)
+        yield configs, evaluate_batch(instance, configs, engine)
@@ -0,0 +1,239 @@
+import logging
+import platform
+import time
+
+import numpy as np
+
+from .batch import evaluate_blocks, make_evaluator
+from .census import landscape_census
+from .climb import climb_samples
+from .configuration import Configuration
+from .experiments import calculate_hamming_distances, classify_configuration, is_local_optimum
+from .family import InstanceFamily, evaluate_family
+from .flips import FlipEngine
+from .generator import random_instance
+from .plateau import explore_plateau
+from .rng import chunk_rng, instance_rng, random_configurations
+from .sequential import DEFAULT_LOOK_SIZE
+from .walks import DEFAULT_MAX_LAG, random_walk_autocorrelation
+
+# Benchmarks of the evaluation kernels on fixed instances. A fixture is one random instance with the
+# (n, m, k) of an experiment, generated from FIXTURE_SEED, so every run measures the same work. Each
+# benchmark is timed `repeat` times and the fastest run is kept: the slower ones measure interference
+# from the rest of the machine. Rates are configurations/s, neighbor evaluations/s (n flips per
+# configuration) and optimum pairs/s; a run can be compared with a saved run to flag regressions.
+
+FIXTURE_SEED = 2024
+FIXTURES = {
+    "n10-m50": (10, 50, 3),    # Exp1, Exp2
+    "n20-m50": (20, 50, 3),    # Exp3, Exp5
+    "n40-m200": (40, 200, 3),  # Exp4
+    "n50-m700": (50, 700, 3),  # Exp6
+}
+DEFAULT_REPEAT = 3
+# A rate more than this fraction below the baseline is a regression
+DEFAULT_TOLERANCE = 0.2
+# Work per benchmark run at scale 1
+SCALAR_CONFIGURATIONS = 2000
+BATCH_CONFIGURATIONS = 20000
+DISTANCE_OPTIMA = 2000
+PLATEAU_OPTIMA = 10
+PLATEAU_SIZE = 2000
+# Instances in the stacked family benchmark (copies of the fixture)
+FAMILY_INSTANCES = 20
+# Instances drawn per run of the generator benchmark
+GENERATED_INSTANCES = 100
+# Random walks per run of the walk benchmark, and flips per walk
+WALKS = 100
+WALK_STEPS = 1000
+# Largest n whose census is benchmarked (2^20 configurations)
+CENSUS_VARIABLES = 20
+
+
+def fixture_instance(name):
+    num_variables, num_clauses, clause_width = FIXTURES[name]
+    return random_instance(num_variables, num_clauses, clause_width, instance_rng(FIXTURE_SEED, 0))
+
+
+# Every benchmark takes (instance, rng, scale) and returns (run, counts): run() does the timed work,
+# counts says how much of it there is ({"configurations": ..., "neighbor_evaluations": ...} or {"pairs": ...})
+
+def count_successful_clauses(instance, rng, scale):
+    # One configuration at a time, as Configuration.count_successful_clauses
+    configs = [Configuration.from_values(values)
+               for values in random_configurations(rng, SCALAR_CONFIGURATIONS * scale, instance.num_variables)]
+
+    def run():
+        for config in configs:
+            config.count_successful_clauses(instance)
+    return run, {"configurations": len(configs)}
+
+
+def scalar_checks(check):
+    # check on the incremental FlipEngine: the loop of Exp3 to Exp6
+    def benchmark(instance, rng, scale):
+        configs = random_configurations(rng, SCALAR_CONFIGURATIONS * scale, instance.num_variables)
+        engine = FlipEngine(instance)
+
+        def run():
+            for config in configs:
+                check(config, engine)
+        return run, {"configurations": len(configs), "neighbor_evaluations": len(configs) * instance.num_variables}
+    return benchmark
+
+
+def batch_heights(backend):
+    def benchmark(instance, rng, scale):
+        configs = random_configurations(rng, BATCH_CONFIGURATIONS * scale, instance.num_variables)
+        engine = make_evaluator(instance, backend)
+
+        def run():
+            engine.heights(configs)
+        return run, {"configurations": len(configs)}
+    return benchmark
+
+
+def batch_evaluation(backend):
+    # Heights and all flip deltas in memory-bounded blocks: the sampling loop of Exp1 and Exp2
+    def benchmark(instance, rng, scale):
+        configs = random_configurations(rng, BATCH_CONFIGURATIONS * scale, instance.num_variables)
+
+        def run():
+            for _ in evaluate_blocks(instance, configs, backend=backend):
+                pass
+        return run, {"configurations": len(configs), "neighbor_evaluations": len(configs) * instance.num_variables}
+    return benchmark
+
+
+def family_evaluation(instance, rng, scale):
+    # A family of FAMILY_INSTANCES instances evaluated on shared blocks, as exp1/exp3 --stacked
+    configs = random_configurations(rng, BATCH_CONFIGURATIONS * scale, instance.num_variables)
+    family = InstanceFamily([instance] * FAMILY_INSTANCES)
+
+    def run():
+        for start in range(0, len(configs), DEFAULT_LOOK_SIZE):
+            evaluate_family(family, configs[start:start + DEFAULT_LOOK_SIZE])
+    evaluations = len(configs) * FAMILY_INSTANCES
+    return run, {"configurations": evaluations, "neighbor_evaluations": evaluations * instance.num_variables}
+
+
+def instance_generation(instance, rng, scale):
+    # Random instances with the fixture's n, m and k, as generate_instances draws them
+    count = GENERATED_INSTANCES * scale
+
+    def run():
+        for _ in range(count):
+            random_instance(instance.num_variables, instance.num_clauses, instance.clause_width, rng)
+    return run, {"instances": count, "clauses": count * instance.num_clauses}
+
+
+def random_walks(instance, rng, scale):
+    # Walks of single flips with their autocorrelation, as the walks command
+    walks = WALKS * scale
+
+    def run():
+        random_walk_autocorrelation(instance, walks, WALK_STEPS, DEFAULT_MAX_LAG, rng)
+    return run, {"flips": walks * WALK_STEPS}
+
+
+def census(instance, rng, scale):
+    # Exhaustive enumeration, used instead of sampling for small n
+    if instance.num_variables > CENSUS_VARIABLES:
+        return None
+
+    def run():
+        landscape_census(instance, collect_optima=False)
+    configurations = 2 ** instance.num_variables
+    return run, {"configurations": configurations, "neighbor_evaluations": configurations * instance.num_variables}
+
+
+def hamming_distances(instance, rng, scale):
+    # All pairs of a set of optima, as in Exp6; the distance kernel depends only on n
+    optima = [Configuration.from_values(values)
+              for values in random_configurations(rng, DISTANCE_OPTIMA * scale, instance.num_variables)]
+
+    def run():
+        calculate_hamming_distances(optima)
+    return run, {"pairs": len(optima) * (len(optima) - 1) // 2}
+
+
+def plateau_exploration(instance, rng, scale):
+    # Flood fill of the plateaus of climbed optima, as Exp5 with a plateau size
+    engine = FlipEngine(instance)
+    optima = [result.optimum for result in climb_samples(instance, PLATEAU_OPTIMA * scale, rng=rng) if result.converged]
+
+    def run():
+        return sum(explore_plateau(engine, optimum, PLATEAU_SIZE).size for optimum in optima)
+    return run, {"configurations": run()}
+
+
+BENCHMARKS = {
+    "count_successful_clauses": count_successful_clauses,
+    "is_local_optimum": scalar_checks(is_local_optimum),
+    "heights/numpy": batch_heights("numpy"),
+    "heights/bitslice": batch_heights("bitslice"),
+    "evaluate/numpy": batch_evaluation("numpy"),
+    "evaluate/bitslice": batch_evaluation("bitslice"),
+    "census": census,
+    "hamming_distances": hamming_distances,
+    "plateaus": plateau_exploration,
+    # Appended: a benchmark's random stream is derived from its position here
+    "classify": scalar_checks(classify_configuration),
+    "evaluate/family": family_evaluation,
+    "generate": instance_generation,
+    "walks": random_walks,
+}
+
+
+def time_benchmark(run, repeat=DEFAULT_REPEAT):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmarks(fixtures=None, benchmarks=None, repeat=DEFAULT_REPEAT, scale=1):
+    # {fixture: {benchmark: {"seconds": ..., "<count>_per_second": ...}}}
+    results = {}
+    for fixture in fixtures or FIXTURES:
+        instance = fixture_instance(fixture)
+        results[fixture] = {}
+        for name in benchmarks or BENCHMARKS:
+            # Inputs depend only on the fixture and the benchmark, not on which others run
+            prepared = BENCHMARKS[name](instance, chunk_rng(FIXTURE_SEED, 0, list(BENCHMARKS).index(name)), scale)
+            if prepared is None:
+                continue
+            run, counts = prepared
+            seconds = time_benchmark(run, repeat)
+            rates = {f"{key}_per_second": count / seconds for key, count in counts.items()}
+            results[fixture][name] = dict(seconds=seconds, **rates)
+            logging.info(f"{fixture:>9} {name:<25} "
+                         + ", ".join(f"{value:.4g} {key}" for key, value in rates.items()))
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "machine": platform.machine(),
+            "platform": platform.platform()}
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    # Rates present in both runs as [{fixture, benchmark, metric, baseline, current, ratio, regression}];
+    # baseline is the results part of a saved run
+    comparisons = []
+    for fixture, benchmarks in results.items():
+        for name, rates in benchmarks.items():
+            stored = baseline.get(fixture, {}).get(name, {})
+            for metric, value in rates.items():
+                if not metric.endswith("_per_second") or not stored.get(metric):
+                    continue
+                ratio = value / stored[metric]
+                comparisons.append({"fixture": fixture, "benchmark": name, "metric": metric,
+                                    "baseline": stored[metric], "current": value, "ratio": ratio,
+                                    "regression": ratio < 1 - tolerance})
+                if ratio < 1 - tolerance:
+                    logging.warning(f"Regression: {fixture} {name} {metric} at {ratio:.2f}x the baseline "
+                                    f"({value:.4g} vs {stored[metric]:.4g})")
+    return comparisons
@@ -0,0 +1,115 @@
+import numpy as np
+
+# Bit-sliced evaluation: word w of a variable holds its value in configurations 64*w..64*w+63,
+# so one bitwise operation evaluates a literal for 64 configurations at once.
+# Per-configuration counts are added in bit-sliced form (one word plane per binary digit).
+
+WORD_BITS = 64
+
+
+def pack_configurations(configs):
+    # (B, num_variables) bools -> (num_variables, ceil(B / 64)) uint64 words
+    configs = np.asarray(configs, dtype=bool)
+    num_words = -(-configs.shape[0] // WORD_BITS)
+    bits = np.zeros((configs.shape[1], num_words * WORD_BITS), dtype=bool)
+    bits[:, :configs.shape[0]] = configs.T
+    return np.packbits(bits, axis=1, bitorder="little").view("<u8")
+
+
+def unpack_planes(planes, count):
+    # (P, ..., W) bit planes -> (..., count) integers
+    bits = np.unpackbits(planes.view(np.uint8), axis=-1, bitorder="little")[..., :count]
+    weights = (1 << np.arange(planes.shape[0], dtype=np.int64)).reshape((-1,) + (1,) * (bits.ndim - 1))
+    return (bits.astype(np.int64) * weights).sum(axis=0)
+
+
+def _add_planes(a, b):
+    # Ripple-carry addition of two bit-sliced numbers with the same number of planes
+    out = np.empty((a.shape[0] + 1,) + a.shape[1:], dtype=np.uint64)
+    carry = np.zeros(a.shape[1:], dtype=np.uint64)
+    for plane in range(a.shape[0]):
+        partial = a[plane] ^ b[plane]
+        out[plane] = partial ^ carry
+        carry = (a[plane] & b[plane]) | (carry & partial)
+    out[-1] = carry
+    return out
+
+
+def sliced_sum(words):
+    # words: (N, ...) uint64 -> bit planes (P, ...) holding, for every bit position,
+    # how many of the N words have that bit set. Pairwise adder tree: O(log^2 N) NumPy calls.
+    planes = words[np.newaxis]
+    while planes.shape[1] > 1:
+        if planes.shape[1] % 2:
+            padding = np.zeros(planes.shape[:1] + (1,) + planes.shape[2:], dtype=np.uint64)
+            planes = np.concatenate([planes, padding], axis=1)
+        planes = _add_planes(planes[:, 0::2], planes[:, 1::2])
+    return planes[:, 0]
+
+
+class BitslicedInstance:
+    def __init__(self, instance):
+        self.instance = instance
+        self.num_variables = instance.num_variables
+        # Padding literals read an all-zero word at index num_variables
+        self.variables = instance.variables
+        self.negated = np.where(instance.signs, np.uint64(0), ~np.uint64(0))[..., np.newaxis]
+
+        # Occurrences of every variable as (clause, position) pairs, padded to the same length;
+        # padding points at an extra all-zero row of the flattened occurrence table
+        real = instance.literals != 0
+        flat_index = np.flatnonzero(real)
+        variables = instance.variables[real]
+        order = np.argsort(variables, kind="stable")
+        counts = np.bincount(variables, minlength=self.num_variables)
+        width = max(int(counts.max()) if counts.size else 0, 1)
+        self.occurrences = np.full((self.num_variables, width), instance.literals.size, dtype=np.intp)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        for var in range(self.num_variables):
+            self.occurrences[var, :counts[var]] = flat_index[order[starts[var]:starts[var] + counts[var]]]
+
+    def literal_words(self, words):
+        # (num_variables, W) -> (num_clauses, clause_width, W) literal truth words
+        words = np.concatenate([words, np.zeros((1, words.shape[1]), dtype=np.uint64)])
+        return words[self.variables] ^ self.negated
+
+    def heights(self, configs):
+        satisfied = np.bitwise_or.reduce(self.literal_words(pack_configurations(configs)), axis=1)
+        return unpack_planes(sliced_sum(satisfied), len(configs))
+
+    def evaluate_block(self, configs):
+        # Same contract as FlipEngine.evaluate_block: (heights, (B, num_variables) flip deltas)
+        count = len(configs)
+        literals = self.literal_words(pack_configurations(configs))
+        satisfied = np.bitwise_or.reduce(literals, axis=1)
+        heights = unpack_planes(sliced_sum(satisfied), count)
+
+        # A clause is critical for a literal when none of its other literals is true:
+        # flipping the variable then makes (literal false) or breaks (literal true) the clause
+        width = literals.shape[1]
+        others = np.zeros_like(literals)
+        prefix = np.zeros_like(literals[:, 0])
+        for position in range(width):
+            others[:, position] = prefix
+            prefix = prefix | literals[:, position]
+        suffix = np.zeros_like(literals[:, 0])
+        for position in range(width - 1, -1, -1):
+            others[:, position] |= suffix
+            suffix = suffix | literals[:, position]
+        critical = ~others
+        make = (critical & ~literals).reshape(-1, literals.shape[2])
+        broken = (critical & literals).reshape(-1, literals.shape[2])
+        zero = np.zeros((1, literals.shape[2]), dtype=np.uint64)
+        make = np.concatenate([make, zero])[self.occurrences]
+        broken = np.concatenate([broken, zero])[self.occurrences]
+
+        makes = unpack_planes(sliced_sum(np.moveaxis(make, 1, 0)), count)
+        breaks = unpack_planes(sliced_sum(np.moveaxis(broken, 1, 0)), count)
+        return heights, (makes - breaks).T
+
+
+def configs_per_block(instance, memory_budget):
+    # Peak words per 64 configurations: literal words, prefix/suffix ORs and make/break gathers
+    bitsliced_words = 4 * instance.literals.size + 4 * instance.num_variables * max(
+        int(np.bincount(instance.variables[instance.literals != 0]).max(initial=1)), 1)
+    return max(1, memory_budget // (bitsliced_words * 8)) * WORD_BITS
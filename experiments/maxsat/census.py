@@ -0,0 +1,152 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from . import instrument
+from .flips import FlipEngine
+
+# 2^30 configurations is about the limit of what a census finishes in reasonable time
+CENSUS_MAX_VARIABLES = 30
+# Low variables enumerated together as one NumPy block; the rest are walked in Gray-code order
+DEFAULT_BLOCK_BITS = 12
+
+
+def census_feasible(num_variables, num_configurations=None):
+    # A census is used when it is no more work than the sampling it replaces
+    if num_variables > CENSUS_MAX_VARIABLES:
+        return False
+    return num_configurations is None or 2 ** num_variables <= num_configurations
+
+
+def gray_code(index):
+    return index ^ (index >> 1)
+
+
+class CensusResult:
+    def __init__(self, num_variables, num_clauses):
+        self.num_variables = num_variables
+        self.num_clauses = num_clauses
+        self.num_configurations = 0
+        self.strict_count = 0
+        self.non_strict_count = 0
+        # Exact number of optima at every height 0..num_clauses
+        self.strict_heights = np.zeros(num_clauses + 1, dtype=np.int64)
+        self.non_strict_heights = np.zeros(num_clauses + 1, dtype=np.int64)
+        # Non-strict optima as bitmasks (bit i = variable i + 1); strict ones are flagged
+        self.optima = np.zeros(0, dtype=np.uint64)
+        self.optima_heights = np.zeros(0, dtype=np.int32)
+        self.optima_strict = np.zeros(0, dtype=bool)
+
+    def count(self, strictly_greater):
+        return self.strict_count if strictly_greater else self.non_strict_count
+
+    def fraction(self, strictly_greater):
+        return self.count(strictly_greater) / self.num_configurations
+
+    @property
+    def strict_fraction(self):
+        return self.fraction(True)
+
+    @property
+    def non_strict_fraction(self):
+        return self.fraction(False)
+
+    def height_histogram(self, strictly_greater):
+        return self.strict_heights if strictly_greater else self.non_strict_heights
+
+    def optima_for(self, strictly_greater):
+        if strictly_greater:
+            return self.optima[self.optima_strict], self.optima_heights[self.optima_strict]
+        return self.optima, self.optima_heights
+
+    def update(self, other):
+        # Parts are merged in Gray-code order so the optima list does not depend on the worker count
+        self.num_configurations += other.num_configurations
+        self.strict_count += other.strict_count
+        self.non_strict_count += other.non_strict_count
+        self.strict_heights += other.strict_heights
+        self.non_strict_heights += other.non_strict_heights
+        self.optima = np.concatenate([self.optima, other.optima])
+        self.optima_heights = np.concatenate([self.optima_heights, other.optima_heights])
+        self.optima_strict = np.concatenate([self.optima_strict, other.optima_strict])
+        return self
+
+
+def census_range(instance, start, stop, block_bits=DEFAULT_BLOCK_BITS, collect_optima=True):
+    # Visits every configuration whose high variables follow Gray codes start..stop-1.
+    # Each Gray step flips one high variable, so the true-literal counts of the whole
+    # low block are updated only on the clauses containing that variable.
+    num_variables = instance.num_variables
+    low_bits = min(block_bits, num_variables)
+    engine = FlipEngine(instance)
+    result = CensusResult(num_variables, instance.num_clauses)
+
+    low = np.arange(2 ** low_bits, dtype=np.uint64)
+    values = np.zeros((low.size, num_variables), dtype=bool)
+    values[:, :low_bits] = (low[:, None] >> np.arange(low_bits, dtype=np.uint64)) & 1
+    high = gray_code(start)
+    for bit in range(num_variables - low_bits):
+        values[:, low_bits + bit] = (high >> bit) & 1
+    counts = engine.batch_true_counts(values)
+
+    optima, optima_heights, optima_strict = [], [], []
+    for index in range(start, stop):
+        if index > start:
+            bit = (index & -index).bit_length() - 1
+            var = low_bits + bit
+            high ^= 1 << bit
+            occurrences = slice(engine.offsets[var], engine.offsets[var + 1])
+            literal_true = engine.occurrence_signs[occurrences] == values[0, var]
+            counts[:, engine.occurrence_clauses[occurrences]] += np.where(literal_true, -1, 1).astype(np.int16)
+            values[:, var] = ~values[:, var]
+
+        heights = np.count_nonzero(counts, axis=1)
+        best = engine.batch_deltas(values, counts).max(axis=1)
+        strict = best < 0
+        non_strict = best <= 0
+
+        result.num_configurations += low.size
+        result.strict_count += int(np.count_nonzero(strict))
+        result.non_strict_count += int(np.count_nonzero(non_strict))
+        result.strict_heights += np.bincount(heights[strict], minlength=instance.num_clauses + 1)
+        result.non_strict_heights += np.bincount(heights[non_strict], minlength=instance.num_clauses + 1)
+        if collect_optima and non_strict.any():
+            optima.append(low[non_strict] | np.uint64(high << low_bits))
+            optima_heights.append(heights[non_strict].astype(np.int32))
+            optima_strict.append(strict[non_strict])
+
+    if optima:
+        result.optima = np.concatenate(optima)
+        result.optima_heights = np.concatenate(optima_heights)
+        result.optima_strict = np.concatenate(optima_strict)
+    return result
+
+
+def landscape_census(instance, workers=1, block_bits=DEFAULT_BLOCK_BITS, num_chunks=None, collect_optima=True):
+    if instance.num_variables > CENSUS_MAX_VARIABLES:
+        raise ValueError(f"Census is limited to {CENSUS_MAX_VARIABLES} variables, got {instance.num_variables}")
+    if instance.num_variables == 0:
+        raise ValueError("Census needs at least one variable")
+
+    total = 2 ** max(instance.num_variables - block_bits, 0)
+    if num_chunks is None:
+        num_chunks = max(workers, 1) * 4
+    num_chunks = min(num_chunks, total)
+    bounds = [total * i // num_chunks for i in range(num_chunks + 1)]
+    starts, stops = bounds[:-1], bounds[1:]
+
+    with instrument.phase("census"):
+        if workers > 1 and num_chunks > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(census_range, repeat(instance), starts, stops,
+                                      repeat(block_bits), repeat(collect_optima)))
+        else:
+            parts = [census_range(instance, start, stop, block_bits, collect_optima)
+                     for start, stop in zip(starts, stops)]
+
+    result = CensusResult(instance.num_variables, instance.num_clauses)
+    for part in parts:
+        result.update(part)
+    instrument.count("census_configurations", result.num_configurations)
+    return result
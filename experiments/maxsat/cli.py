@@ -0,0 +1,388 @@
+import argparse
+import json
+import logging
+import os
+import sys
+
+from . import experiments, instrument
+from .corpus import load_instances, write_corpus
+from .dimacs import write_dimacs, write_wcnf
+from .generator import GENERATOR
+from .batch import BACKENDS
+from .bench import BENCHMARKS, DEFAULT_REPEAT, DEFAULT_TOLERANCE, FIXTURES, compare, environment, run_benchmarks
+from .climb import STRATEGIES
+from .parallel import DEFAULT_CHUNK_SIZE, default_workers
+from .refine import DEFAULT_RATIOS, METRICS, ratio_curve, refine_ratio
+from .rng import resolve_seed
+from .sequential import DEFAULT_CONFIDENCE, INTERVALS
+from .store import ShardStore
+from .stream import IntegerHistogram
+from .sweep import OPTIONS, Sweep, grid
+from .walks import DEFAULT_MAX_LAG, DEFAULT_STEPS, walk_summary
+
+# python -m maxsat <experiment> [flags]: runs one experiment without a display and writes its
+# results as JSON. Figures are drawn only with --plot DIR (saved as PNG) or --show.
+
+# Parameters of the original scripts: (n, m, k, instances, configurations); for walks the last one is
+# the number of walks per instance
+DEFAULTS = {
+    "exp1": (10, 50, 3, 5, 1000000),
+    "exp2": (10, 50, 3, 100, 1000000),
+    "exp3": (20, 50, 3, 100, 1000),
+    "exp4": (40, 200, 3, 100, 10000),
+    "exp5": (20, 50, 3, 100, 10000),
+    "exp6": (50, 700, 3, 100, 40000),
+    "walks": (20, 50, 3, 100, 100),
+}
+
+DESCRIPTIONS = {
+    "exp1": "share of configurations that are local optima (strict and non-strict)",
+    "exp2": "distribution of local optima by height",
+    "exp3": "mean, standard deviation, median and MAD of local optima heights",
+    "exp4": "share of same-height neighbors of local optima",
+    "exp5": "same-height neighbor metrics over 100 local optima per instance",
+    "exp6": "Hamming distance between local optima of the same height",
+    "walks": "height autocorrelation and correlation length along random walks of single flips",
+}
+
+SAMPLING = ("uniform",) + STRATEGIES
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m maxsat", description="MAX-SAT landscape experiments")
+    subparsers = parser.add_subparsers(dest="experiment", required=True, metavar="command")
+    for name, (num_variables, num_clauses, clause_width, num_instances, num_configurations) in DEFAULTS.items():
+        sub = subparsers.add_parser(name, help=DESCRIPTIONS[name], description=DESCRIPTIONS[name])
+        sub.add_argument("-n", "--variables", type=int, default=num_variables, help="number of variables")
+        sub.add_argument("-m", "--clauses", type=int, default=num_clauses, help="number of clauses")
+        sub.add_argument("-k", "--clause-width", type=int, default=clause_width, help="literals per clause")
+        sub.add_argument("-i", "--instances", type=int, default=num_instances, help="number of random instances")
+        sub.add_argument("-N", "--configurations", type=int, default=num_configurations,
+                         help="configurations (or climbs, or walks) per instance")
+        sub.add_argument("--seed", type=int, default=None, help="run seed (default: fresh, logged)")
+        sub.add_argument("--corpus", metavar="PATH", default=None,
+                         help="binary corpus, DIMACS file or directory of DIMACS files to use instead of "
+                              "random instances (-n, -m, -k and -i are then ignored)")
+        sub.add_argument("--instance-cache", metavar="DIR", default=None,
+                         help="keep the random instances of a seeded run in DIR and reuse them in later runs")
+        sub.add_argument("-w", "--workers", type=int, default=default_workers(), help="worker processes")
+        sub.add_argument("-o", "--output", default=None, help="write the JSON results here instead of stdout")
+        sub.add_argument("--plot", metavar="DIR", default=None, help="save the figures as PNG files in DIR")
+        sub.add_argument("--show", action="store_true", help="open the figures in a window instead of saving them")
+        sub.add_argument("-q", "--quiet", action="store_true", help="log warnings only")
+        sub.add_argument("--report", metavar="FILE", default=None,
+                         help="record call counts, phase times, throughput and peak memory, and write them as JSON")
+        sub.add_argument("--progress", action="store_true", help="show a live progress line on stderr")
+        if name in ("exp1", "exp2", "exp3"):
+            sub.add_argument("--precision", type=float, default=None,
+                             help="sample each instance only until the confidence interval's half-width (on the "
+                                  "local optimum ratio for exp1, the mean optimum height otherwise) is this small; "
+                                  "-N is then the budget")
+            sub.add_argument("--relative", action="store_true", help="precision is relative to the estimate")
+            sub.add_argument("--confidence", type=float, default=DEFAULT_CONFIDENCE)
+        if name in ("exp1", "exp3"):
+            sub.add_argument("--stacked", action="store_true",
+                             help="evaluate all instances (one n, m, k) together on shared configurations")
+        if name == "exp1":
+            sub.add_argument("--interval", choices=INTERVALS, default="wilson",
+                             help="clopper-pearson needs scipy")
+        if name == "exp2":
+            sub.add_argument("--strict", action="store_true", help="count strict local optima only")
+            sub.add_argument("--backend", choices=BACKENDS, default="bitslice")
+            sub.add_argument("--store", metavar="DIR", default=None,
+                             help="write every finished work unit to DIR and resume from it after a restart")
+        if name in ("exp2", "exp4"):
+            sub.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE if name == "exp2" else 2500,
+                             help="configurations per work unit")
+        if name in ("exp5", "exp6"):
+            sub.add_argument("--sampling", choices=SAMPLING, default="steepest",
+                             help="uniform random configurations or hill climbing")
+            sub.add_argument("--required-count", type=int, default=100,
+                             help="local optima to collect per instance (per height for exp6)")
+        if name == "exp5":
+            sub.add_argument("--plateau-size", type=int, default=None, metavar="N",
+                             help="explore the equal-height plateau of every optimum, up to N configurations")
+        if name == "walks":
+            sub.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="flips per walk")
+            sub.add_argument("--max-lag", type=int, default=DEFAULT_MAX_LAG,
+                             help="longest lag of the autocorrelation, in flips")
+
+    sub = subparsers.add_parser("corpus", help="write random instances (or converted files) as a corpus or DIMACS",
+                                description="Write random instances, or the instances read from --source, to a "
+                                            "binary corpus file or to a directory of DIMACS files.")
+    sub.add_argument("output", help="corpus file, or directory for --format cnf/wcnf")
+    sub.add_argument("--format", choices=("binary", "cnf", "wcnf"), default="binary")
+    sub.add_argument("--source", metavar="PATH", default=None,
+                     help="convert this corpus, DIMACS file or directory instead of generating instances")
+    sub.add_argument("-n", "--variables", type=int, default=20, help="number of variables")
+    sub.add_argument("-m", "--clauses", type=int, default=50, help="number of clauses")
+    sub.add_argument("-k", "--clause-width", type=int, default=3, help="literals per clause")
+    sub.add_argument("-i", "--instances", type=int, default=100, help="number of random instances")
+    sub.add_argument("--seed", type=int, default=None, help="run seed (default: fresh, logged)")
+    sub.add_argument("-q", "--quiet", action="store_true", help="log warnings only")
+
+    sub = subparsers.add_parser("sweep", help="run one experiment over a grid of (n, m, k) points",
+                                description="Run one experiment over a grid of (n, m, k) points from a job queue "
+                                            "kept in an SQLite file. Rerun the command to resume; points given "
+                                            "again are skipped, new ones are added. Flags left out on a rerun "
+                                            "keep their stored values.")
+    sub.add_argument("database", help="SQLite file holding the job queue and the results")
+    sub.add_argument("sweep_experiment", metavar="experiment", choices=sorted(DEFAULTS))
+    sub.add_argument("-n", "--variables", type=int, nargs="+", default=None, help="numbers of variables")
+    clauses = sub.add_mutually_exclusive_group()
+    clauses.add_argument("-m", "--clauses", type=int, nargs="+", default=None, help="numbers of clauses")
+    clauses.add_argument("--ratios", type=float, nargs="+", default=None,
+                         help="clause-to-variable ratios m/n instead of numbers of clauses")
+    sub.add_argument("-k", "--clause-width", type=int, nargs="+", default=None, help="literals per clause")
+    sub.add_argument("--points", type=parse_point, nargs="+", default=(), metavar="N,M,K",
+                     help="single points, in addition to the grid")
+    sub.add_argument("-i", "--instances", type=int, default=None, help="random instances per point")
+    sub.add_argument("-N", "--configurations", type=int, default=None,
+                     help="configurations (or climbs, or walks) per instance")
+    sub.add_argument("--seed", type=int, default=None, help="run seed (default: fresh, logged)")
+    sub.add_argument("-w", "--workers", type=int, default=default_workers(), help="worker processes")
+    sub.add_argument("--status", action="store_true", help="report progress and results without running jobs")
+    sub.add_argument("--refine", type=int, metavar="POINTS", default=None,
+                     help=f"exp1/exp3/walks with one n and k: start from the --ratios (default {DEFAULT_RATIOS}) "
+                          "and add points where the metric changes fastest or the intervals overlap most, until the "
+                          "m/n curve has POINTS points")
+    sub.add_argument("--per-round", type=int, default=2, help="points added per refinement round")
+    sub.add_argument("-o", "--output", default=None, help="write the JSON results here instead of stdout")
+    sub.add_argument("-q", "--quiet", action="store_true", help="log warnings only")
+    options = sub.add_argument_group("experiment options", "used by the experiments that have them")
+    options.add_argument("--strict", dest="strictly_greater", action="store_true", default=None)
+    options.add_argument("--backend", choices=BACKENDS, default=None)
+    options.add_argument("--chunk-size", type=int, default=None)
+    options.add_argument("--precision", type=float, default=None)
+    options.add_argument("--relative", action="store_true", default=None)
+    options.add_argument("--confidence", type=float, default=None)
+    options.add_argument("--interval", choices=INTERVALS, default=None)
+    options.add_argument("--sampling", choices=SAMPLING, default=None)
+    options.add_argument("--required-count", type=int, default=None)
+    options.add_argument("--plateau-size", type=int, default=None)
+    options.add_argument("--steps", type=int, default=None)
+    options.add_argument("--max-lag", type=int, default=None)
+
+    sub = subparsers.add_parser("bench", help="time the evaluation kernels on fixed instances",
+                                description="Time the evaluation kernels on fixed-seed instances with the (n, m, k) "
+                                            "of the experiments, optionally against a saved run.")
+    sub.add_argument("--fixtures", nargs="+", choices=list(FIXTURES), default=None)
+    sub.add_argument("--benchmarks", nargs="+", choices=list(BENCHMARKS), default=None)
+    sub.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per benchmark (the fastest counts)")
+    sub.add_argument("--scale", type=int, default=1, help="multiply the work per run")
+    sub.add_argument("--baseline", metavar="FILE", default=None,
+                     help="JSON of an earlier run (-o); exit with status 1 if a rate dropped by more than --tolerance")
+    sub.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    sub.add_argument("-o", "--output", default=None, help="write the JSON results here instead of stdout")
+    sub.add_argument("-q", "--quiet", action="store_true", help="log warnings only")
+    return parser
+
+
+def parse_point(text):
+    try:
+        num_variables, num_clauses, clause_width = (int(value) for value in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected N,M,K, got {text!r}")
+    return num_variables, num_clauses, clause_width
+
+
+def make_instances(args):
+    if args.corpus is not None:
+        return load_instances(args.corpus)
+    return experiments.generate_instances(args.variables, args.clauses, args.clause_width, args.instances, args.seed,
+                                          args.instance_cache)
+
+
+def write_instances(args):
+    if args.source is not None:
+        instances = load_instances(args.source)
+    else:
+        instances = experiments.generate_instances(args.variables, args.clauses, args.clause_width,
+                                                   args.instances, resolve_seed(args.seed))
+    if args.format == "binary":
+        write_corpus(args.output, instances)
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        write = write_dimacs if args.format == "cnf" else write_wcnf
+        for index, instance in enumerate(instances):
+            write(instance, os.path.join(args.output, f"instance-{index:05d}.{args.format}"))
+    logging.info(f"{len(instances)} instances written to {args.output}")
+
+
+def run_sweep(args):
+    num_variables, num_clauses, clause_width, num_instances, num_configurations = DEFAULTS[args.sweep_experiment]
+    if not os.path.exists(args.database):
+        # A new sweep takes the experiment's defaults for whatever is not given
+        args.instances = num_instances if args.instances is None else args.instances
+        args.configurations = num_configurations if args.configurations is None else args.configurations
+    sweep = Sweep(args.database, args.sweep_experiment, args.instances, args.configurations, args.seed,
+                  {name: getattr(args, name) for name in OPTIONS[args.sweep_experiment]})
+    curve = None
+    if args.refine is not None:
+        if sweep.experiment not in METRICS or len(args.variables or ()) > 1 or len(args.clause_width or ()) > 1:
+            raise SystemExit(f"--refine needs one of {sorted(METRICS)} with a single -n and -k")
+        num_variables = (args.variables or [num_variables])[0]
+        clause_width = (args.clause_width or [clause_width])[0]
+        if args.ratios:
+            ratios = args.ratios
+        else:
+            ratios = [m / num_variables for m in args.clauses] if args.clauses else DEFAULT_RATIOS
+        if args.status:
+            curve = ratio_curve(sweep, num_variables, clause_width, bool(args.strictly_greater))
+        else:
+            curve = refine_ratio(sweep, num_variables, clause_width, ratios, args.refine, args.per_round,
+                                 args.workers, bool(args.strictly_greater))
+    else:
+        points = list(args.points)
+        if args.variables or args.clauses or args.ratios or args.clause_width or not (points or sweep.points()):
+            points.extend(grid(args.variables or [num_variables], args.clauses or [num_clauses],
+                               args.clause_width or [clause_width], args.ratios))
+        added = sweep.add_points(points)
+        if added:
+            logging.info(f"{added} points added to {args.database}")
+        if not args.status:
+            sweep.run(args.workers)
+    progress = sweep.progress()
+    results = {"experiment": sweep.experiment, "seed": sweep.seed,
+               "parameters": {"num_instances": sweep.parameters["num_instances"],
+                              "num_configurations": sweep.parameters["num_configurations"], **sweep.options},
+               "jobs": progress, "points": sweep.results()}
+    if curve is not None:
+        results["curve"] = curve
+    sweep.close()
+    return results
+
+
+def run_bench(args):
+    results = {"environment": environment(), "repeat": args.repeat, "scale": args.scale,
+               "results": run_benchmarks(args.fixtures, args.benchmarks, args.repeat, args.scale)}
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if (baseline.get("repeat"), baseline.get("scale")) != (args.repeat, args.scale):
+            logging.warning("The baseline was run with a different --repeat or --scale")
+        results["comparisons"] = compare(results["results"], baseline["results"], args.tolerance)
+        results["regressions"] = sum(comparison["regression"] for comparison in results["comparisons"])
+    return results
+
+
+def run(args):
+    # Returns (JSON-ready results, [(figure name, plot function, arguments)])
+    instances = make_instances(args)
+    if args.experiment == "exp1":
+        estimates = experiments.calculate_local_optima_estimates(
+            instances, args.configurations, args.seed, args.precision, args.confidence, args.interval, args.relative,
+            args.stacked,
+        )
+        strict = [estimate.estimate for estimate in estimates["strict"]]
+        non_strict = [estimate.estimate for estimate in estimates["non_strict"]]
+        results = {"strict": strict, "non_strict": non_strict,
+                   "strict_estimates": [estimate.as_dict() for estimate in estimates["strict"]],
+                   "non_strict_estimates": [estimate.as_dict() for estimate in estimates["non_strict"]]}
+        figures = [("strict", "plot_local_optima_ratio", (strict, "Strictly Greater")),
+                   ("non-strict", "plot_local_optima_ratio", (non_strict, "Greater or Equal"))]
+    elif args.experiment == "exp2":
+        height_counts = experiments.calculate_height_distribution(
+            instances, args.configurations, args.strict, args.backend, args.workers, args.chunk_size, args.seed,
+            args.store, args.precision, args.confidence, args.relative,
+        )
+        results = {"total_local_optima": int(height_counts.sum()), "height_counts": height_counts.tolist()}
+        num_clauses = max(instance.num_clauses for instance in instances)
+        figures = [("heights", "plot_height_distribution", (height_counts, num_clauses))]
+    elif args.experiment == "exp3":
+        histograms, estimates = experiments.calculate_height_histograms(
+            instances, args.configurations, args.seed, args.precision, args.confidence, args.relative, args.stacked)
+        heights = IntegerHistogram.merged(histograms)
+        results = dict(heights.metrics(), total_local_optima=heights.total,
+                       estimates=[estimate.as_dict() for estimate in estimates])
+        figures = []
+    elif args.experiment == "exp4":
+        heights, equal_neighbors = experiments.calculate_neighbor_percentages(
+            instances, args.configurations, args.workers, args.chunk_size, args.seed)
+        num_variables = max(instance.num_variables for instance in instances)
+        results = {"total_local_optima": heights.total, "height_counts": heights.counts.tolist(),
+                   "equal_neighbor_counts": equal_neighbors.counts.tolist(),
+                   "mean_neighbor_percentage": equal_neighbors.mean / num_variables if heights.total else None}
+        figures = [("neighbors", "plot_neighbor_percentages", (equal_neighbors.counts, num_variables))]
+    elif args.experiment == "exp5":
+        all_metrics, errors = experiments.calculate_all_metrics(instances, args.configurations, args.sampling,
+                                                                args.workers, args.seed, args.required_count,
+                                                                args.plateau_size)
+        results = {"metrics": all_metrics, "errors": [str(error) for error in errors]}
+        figures = [("metrics", "visualize_all_metrics", (all_metrics, experiments.METRIC_NAMES))]
+        if args.plateau_size is not None:
+            figures.append(("plateaus", "visualize_all_metrics", (all_metrics, experiments.PLATEAU_METRICS)))
+    elif args.experiment == "exp6":
+        means, summaries, table = experiments.analyze_optima(instances, args.configurations, args.sampling,
+                                                             args.workers, args.seed, args.required_count)
+        results = {"distance_means": {str(height): mean for height, mean in sorted(means.items())},
+                   "distance_stats": experiments.distance_table_rows(table), "optima": summaries}
+        figures = [("distances", "visualize_height_distance_seaborn", (means,))]
+    else:
+        estimates = experiments.calculate_autocorrelations(instances, args.configurations, args.steps, args.max_lag,
+                                                           args.workers, args.seed)
+        results = walk_summary(estimates, args.max_lag)
+        figures = [("autocorrelation", "plot_autocorrelation",
+                    (results["autocorrelation"], results["correlation_length"]))]
+    return results, figures
+
+
+def write_results(results, output=None):
+    if output is None:
+        json.dump(results, sys.stdout)
+        sys.stdout.write("\n")
+    else:
+        with open(output, "w") as file:
+            json.dump(results, file)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format='%(asctime)s %(levelname)s:%(message)s')
+    if args.experiment == "corpus":
+        write_instances(args)
+        return 0
+    if args.experiment == "bench":
+        results = run_bench(args)
+        write_results(results, args.output)
+        return 1 if results.get("regressions") else 0
+    if args.experiment == "sweep":
+        write_results(run_sweep(args), args.output)
+        return 0
+
+    if args.corpus is None:
+        parameters = {"num_variables": args.variables, "num_clauses": args.clauses,
+                      "num_vars_in_clause": args.clause_width, "num_instances": args.instances,
+                      "generator": GENERATOR}
+    else:
+        parameters = {"corpus": os.path.abspath(args.corpus)}
+    parameters["num_configurations"] = args.configurations
+    if getattr(args, "store", None) is not None:
+        # A resumed run must repeat the stored run exactly, including its seed
+        args.store = ShardStore(args.store, dict(parameters, experiment=args.experiment, seed=args.seed,
+                                                 strictly_greater=args.strict, chunk_size=args.chunk_size,
+                                                 precision=args.precision, relative=args.relative,
+                                                 confidence=args.confidence))
+        args.seed = args.store.seed
+    args.seed = resolve_seed(args.seed)
+
+    if args.report is not None or args.progress:
+        instrument.enable(progress=args.progress)
+    results, figures = run(args)
+    recorder = instrument.disable()
+    if args.report is not None:
+        instrument.write_report(args.report, recorder, experiment=args.experiment, seed=args.seed,
+                                parameters=parameters, workers=args.workers)
+    results = dict(experiment=args.experiment, seed=args.seed, parameters=parameters, **results)
+
+    write_results(results, args.output)
+
+    if figures and (args.plot is not None or args.show):
+        from . import plots
+        if args.plot is not None:
+            os.makedirs(args.plot, exist_ok=True)
+        for name, function, arguments in figures:
+            path = None if args.show else os.path.join(args.plot, f"{args.experiment}-{name}.png")
+            getattr(plots, function)(*arguments, path=path)
+    return 0
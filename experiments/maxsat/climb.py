@@ -0,0 +1,81 @@
+from collections import Counter
+
+import numpy as np
+
+from . import instrument
+from .flips import FlipEngine
+from .instance import to_bitmask
+from .rng import random_configurations
+
+STRATEGIES = ("steepest", "first")
+
+
+class ClimbResult:
+    def __init__(self, start, optimum, height, steps, strict, equal_neighbors, converged=True):
+        self.start = start
+        self.optimum = optimum
+        self.height = height
+        self.steps = steps
+        # strict: every neighbor is worse; equal_neighbors: neighbors at the optimum's height
+        self.strict = strict
+        self.equal_neighbors = equal_neighbors
+        # False when max_steps stopped the climb with an improving flip left: optimum is then not a
+        # local optimum
+        self.converged = converged
+
+    def __repr__(self):
+        cut_off = "" if self.converged else ", converged=False"
+        return f"ClimbResult(height={self.height}, steps={self.steps}, strict={self.strict}{cut_off})"
+
+
+def hill_climb(engine, start, strategy="steepest", rng=None, max_steps=None):
+    # Climbs from start until no single flip increases the height (a non-strict local optimum).
+    # steepest: flip a variable with the largest gain, ties broken at random.
+    # first: flip the first improving variable of a random scan order, which is a uniformly
+    # random improving variable, so it is read off the same delta vector.
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+    if rng is None:
+        rng = np.random.default_rng()
+    start = np.array(start, dtype=bool)
+    engine.reset(start)
+    steps = 0
+    while max_steps is None or steps < max_steps:
+        deltas = engine.deltas()
+        improving = np.flatnonzero(deltas > 0)
+        if improving.size == 0:
+            break
+        if strategy == "steepest":
+            improving = improving[deltas[improving] == deltas[improving].max()]
+        engine.flip(int(improving[rng.integers(improving.size)]))
+        steps += 1
+    else:
+        deltas = engine.deltas()
+
+    return ClimbResult(start, engine.values.copy(), engine.height, steps,
+                       bool(deltas.size == 0 or deltas.max() < 0), int(np.count_nonzero(deltas == 0)),
+                       bool(deltas.size == 0 or deltas.max() <= 0))
+
+
+def climb_samples(instance, num_starts, strategy="steepest", rng=None, max_steps=None):
+    # One climb from each of num_starts uniform random configurations; climbs cut off by max_steps are
+    # yielded too (converged=False) and counted as "climbs_cut_off"
+    if rng is None:
+        rng = np.random.default_rng()
+    engine = FlipEngine(instance)
+    for start in random_configurations(rng, num_starts, instance.num_variables):
+        with instrument.phase("climb"):
+            result = hill_climb(engine, start, strategy, rng, max_steps)
+        instrument.count("climbs")
+        instrument.count("climb_steps", result.steps)
+        if not result.converged:
+            instrument.count("climbs_cut_off")
+        yield result
+
+
+def basin_estimates(results):
+    # Fraction of climbs ending in each optimum (bitmask) estimates its basin of attraction
+    # under the chosen strategy, as a share of the whole search space; cut-off climbs are left out
+    hits = Counter(to_bitmask(result.optimum) for result in results if result.converged)
+    total = sum(hits.values())
+    return {mask: count / total for mask, count in hits.items()}
@@ -0,0 +1,104 @@
+import numpy as np
+
+from .instance import from_bitmask, to_bitmask
+from .rng import random_bits
+
+
+class Configuration:
+    # An assignment stored as one Python int: bit i is the value of variable i + 1
+    # (the same convention as to_bitmask and the census). Flipping is a single XOR and
+    # neighbors are read off the mask on demand, so nothing is copied per neighbor.
+    __slots__ = ("num_variables", "mask")
+
+    def __init__(self, num_variables, mask=0):
+        if mask >> num_variables:
+            raise ValueError(f"Mask has bits beyond variable {num_variables}")
+        self.num_variables = num_variables
+        self.mask = mask
+
+    @classmethod
+    def from_values(cls, values):
+        return cls(len(values), to_bitmask(values))
+
+    @classmethod
+    def from_packed(cls, packed, num_variables):
+        # packed: little-endian uint8 bytes as produced by packed() and random_bits;
+        # bits past num_variables in the last byte are ignored
+        mask = int.from_bytes(np.asarray(packed, dtype=np.uint8).tobytes(), "little")
+        return cls(num_variables, mask & ((1 << num_variables) - 1))
+
+    @classmethod
+    def random(cls, num_variables, rng=None):
+        rng = rng or np.random.default_rng()
+        return cls.from_packed(random_bits(rng, 1, num_variables)[0], num_variables)
+
+    @property
+    def values(self):
+        return from_bitmask(self.mask, self.num_variables)
+
+    def packed(self):
+        return np.frombuffer(self.mask.to_bytes((self.num_variables + 7) // 8, "little"), dtype=np.uint8)
+
+    def __getitem__(self, var):
+        # 0-based variable index
+        return bool((self.mask >> var) & 1)
+
+    def __len__(self):
+        return self.num_variables
+
+    def flip(self, var):
+        # In place, O(1); do not flip a configuration that is a key in a set or dict
+        self.mask ^= 1 << var
+
+    def flipped(self, var):
+        return Configuration(self.num_variables, self.mask ^ (1 << var))
+
+    def neighbors(self):
+        return Neighbors(self)
+
+    def hamming_distance(self, other):
+        return bin(self.mask ^ other.mask).count("1")
+
+    def count_successful_clauses(self, instance):
+        return instance.count_successful_clauses(self.values)
+
+    def __eq__(self, other):
+        if not isinstance(other, Configuration):
+            return NotImplemented
+        return self.num_variables == other.num_variables and self.mask == other.mask
+
+    def __hash__(self):
+        return hash((self.num_variables, self.mask))
+
+    def __repr__(self):
+        return f"Configuration(num_variables={self.num_variables}, mask={self.mask:#x})"
+
+
+class Neighbors:
+    # Read-only view of the num_variables single-flip neighbors of a configuration.
+    # It keeps the mask it was taken from, so flipping the configuration later does not
+    # change the view; neighbor i differs in variable i and is built only when asked for.
+    __slots__ = ("num_variables", "mask")
+
+    def __init__(self, config):
+        self.num_variables = config.num_variables
+        self.mask = config.mask
+
+    def __len__(self):
+        return self.num_variables
+
+    def __getitem__(self, var):
+        if not -self.num_variables <= var < self.num_variables:
+            raise IndexError("neighbor index out of range")
+        return Configuration(self.num_variables, self.mask ^ (1 << (var % self.num_variables)))
+
+    def __iter__(self):
+        for var in range(self.num_variables):
+            yield Configuration(self.num_variables, self.mask ^ (1 << var))
+
+    def masks(self):
+        return [self.mask ^ (1 << var) for var in range(self.num_variables)]
+
+    def values(self):
+        # (num_variables, num_variables) bools, row i = neighbor i; for batch evaluation
+        return from_bitmask(self.mask, self.num_variables)[np.newaxis, :] ^ np.eye(self.num_variables, dtype=bool)
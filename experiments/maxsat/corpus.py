@@ -0,0 +1,127 @@
+import glob
+import os
+
+import numpy as np
+
+from .dimacs import read_dimacs
+from .instance import CompiledInstance
+
+# Binary instance corpus: many compiled instances in one file that is opened with numpy.memmap.
+#   header  8-byte magic, uint64 number of instances
+#   table   one record per instance: num_variables, num_clauses, clause_width, number of tautological
+#           clauses dropped when compiling, offset into the data
+#   data    every instance's (num_clauses, clause_width) int32 literals, flattened, back to back
+# Instances are read-only views into the mapped file, so opening a corpus copies nothing, and worker
+# processes receive (path, index) instead of pickled clause arrays: they map the same file and share
+# its pages through the OS cache.
+
+MAGIC = b"MAXSATC1"
+TABLE_DTYPE = np.dtype([("num_variables", "<i4"), ("num_clauses", "<i4"), ("clause_width", "<i4"),
+                        ("tautologies", "<i4"), ("offset", "<i8")])
+HEADER_SIZE = len(MAGIC) + 8
+DIMACS_PATTERNS = ("*.cnf", "*.wcnf", "*.cnf.gz", "*.wcnf.gz")
+
+# Corpora already mapped by this process, by path
+_open_corpora = {}
+
+
+def write_corpus(path, instances):
+    instances = list(instances)
+    table = np.zeros(len(instances), dtype=TABLE_DTYPE)
+    offset = 0
+    for record, instance in zip(table, instances):
+        record["num_variables"] = instance.num_variables
+        record["num_clauses"] = instance.num_clauses
+        record["clause_width"] = instance.clause_width
+        record["tautologies"] = instance.tautologies
+        record["offset"] = offset
+        offset += instance.literals.size
+    # One temporary file per process: parallel writers of the same corpus do not interleave
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(MAGIC)
+        file.write(np.uint64(len(instances)).tobytes())
+        file.write(table.tobytes())
+        for instance in instances:
+            file.write(np.ascontiguousarray(instance.literals, dtype="<i4").tobytes())
+    os.replace(temporary, path)
+
+
+def is_corpus(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class CorpusInstance(CompiledInstance):
+    # A compiled instance backed by a corpus file; it pickles as (path, index)
+    __slots__ = ("corpus_path", "index")
+
+    def __init__(self, num_variables, literals, corpus_path, index, tautologies=0):
+        super().__init__(num_variables, literals, tautologies)
+        self.corpus_path = corpus_path
+        self.index = index
+
+    def __reduce__(self):
+        return corpus_instance, (self.corpus_path, self.index)
+
+
+class Corpus:
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        with open(self.path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an instance corpus")
+            count = int(np.frombuffer(file.read(8), dtype="<u8")[0])
+        self.table = np.memmap(self.path, dtype=TABLE_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+        total = int((self.table["num_clauses"].astype(np.int64) * self.table["clause_width"]).sum())
+        data_offset = HEADER_SIZE + count * TABLE_DTYPE.itemsize
+        self.literals = (np.memmap(self.path, dtype="<i4", mode="r", offset=data_offset, shape=(total,))
+                         if total else np.zeros(0, dtype="<i4"))
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        record = self.table[index]
+        start = int(record["offset"])
+        shape = (int(record["num_clauses"]), int(record["clause_width"]))
+        literals = self.literals[start:start + shape[0] * shape[1]].reshape(shape)
+        return CorpusInstance(int(record["num_variables"]), literals, self.path, index % len(self),
+                              int(record["tautologies"]))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __reduce__(self):
+        return open_corpus, (self.path,)
+
+    def __repr__(self):
+        return f"Corpus({self.path!r}, instances={len(self)})"
+
+
+def open_corpus(path):
+    path = os.path.abspath(path)
+    if path not in _open_corpora:
+        _open_corpora[path] = Corpus(path)
+    return _open_corpora[path]
+
+
+def corpus_instance(path, index):
+    return open_corpus(path)[index]
+
+
+def load_instances(path):
+    # A binary corpus, a DIMACS CNF/WCNF file, or a directory of DIMACS files (in name order)
+    if is_corpus(path):
+        return open_corpus(path)
+    if os.path.isdir(path):
+        files = sorted(set(file for pattern in DIMACS_PATTERNS for file in glob.glob(os.path.join(path, pattern))))
+        if not files:
+            raise ValueError(f"No DIMACS files in {path}")
+        return [read_dimacs(file) for file in files]
+    return [read_dimacs(path)]
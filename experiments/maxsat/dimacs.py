@@ -0,0 +1,113 @@
+import gzip
+import logging
+
+import numpy as np
+
+from .instance import compile_instance, is_tautology
+
+# DIMACS CNF ("p cnf <variables> <clauses>") and WCNF ("p wcnf <variables> <clauses> [<top>]", every
+# clause prefixed by its weight). The 2022 WCNF format without a "p" line, where hard clauses start
+# with "h", is read as well. Clauses end with 0 and may span lines; "c" lines are comments and a
+# "%" line (as in SATLIB files) ends the clause list. Files ending in .gz are decompressed on the fly.
+# Tautological clauses (a literal and its negation) are legal and dropped when compiling: every
+# configuration satisfies them, so they only add CompiledInstance.tautologies to every height.
+
+
+def _open(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+def parse_dimacs(lines):
+    # -> (num_variables or None, clauses, weights or None, top or None)
+    num_variables = None
+    weighted = None  # unknown until the "p" line or the first clause
+    top = None
+    clauses = []
+    weights = []
+    current = []
+    current_weight = None
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("c"):
+            continue
+        if line.startswith("%"):
+            break
+        if line.startswith("p"):
+            fields = line.split()
+            if len(fields) < 4 or fields[1] not in ("cnf", "wcnf"):
+                raise ValueError(f"Malformed problem line: {line!r}")
+            num_variables = int(fields[2])
+            weighted = fields[1] == "wcnf"
+            if weighted and len(fields) > 4:
+                top = int(fields[4])
+            continue
+        for token in line.split():
+            if current_weight is None and weighted is not False:
+                # First token of a weighted clause (a file without a "p" line is 2022 WCNF);
+                # "h" marks a hard clause, stored as -1 until top is known
+                weighted = True
+                current_weight = -1 if token == "h" else int(token)
+                continue
+            literal = int(token)
+            if literal == 0:
+                clauses.append(current)
+                weights.append(current_weight)
+                current = []
+                current_weight = None
+            else:
+                current.append(literal)
+    if current:
+        raise ValueError("Last clause is not terminated by 0")
+    if not weighted:
+        return num_variables, clauses, None, None
+    if top is None:
+        top = sum(weight for weight in weights if weight != -1) + 1
+    return num_variables, clauses, np.array([top if weight == -1 else weight for weight in weights],
+                                            dtype=np.int64), top
+
+
+def read_dimacs(path):
+    # CNF or WCNF file -> CompiledInstance; clause weights are dropped (height counts satisfied clauses)
+    instance, _, _ = read_wcnf(path)
+    return instance
+
+
+def read_wcnf(path):
+    # -> (CompiledInstance, weights or None for plain CNF, top weight or None)
+    with _open(path, "r") as file:
+        num_variables, clauses, weights, top = parse_dimacs(file)
+    instance = compile_instance(clauses, num_variables)
+    if instance.tautologies:
+        logging.info(f"{path}: {instance.tautologies} tautological clauses dropped (always satisfied)")
+        if weights is not None:
+            weights = weights[[not is_tautology(clause) for clause in clauses]]
+    return instance, weights, top
+
+
+def _clause_lines(instance, weights=None):
+    for index, row in enumerate(instance.literals):
+        literals = " ".join(str(literal) for literal in row if literal != 0)
+        prefix = "" if weights is None else f"{weights[index]} "
+        yield f"{prefix}{literals} 0\n" if literals else f"{prefix}0\n"
+
+
+def write_dimacs(instance, path, comments=()):
+    with _open(path, "w") as file:
+        for comment in comments:
+            file.write(f"c {comment}\n")
+        file.write(f"p cnf {instance.num_variables} {instance.num_clauses}\n")
+        file.writelines(_clause_lines(instance))
+
+
+def write_wcnf(instance, path, weights=None, top=None, comments=()):
+    # Unit weights by default; top defaults to one more than the total soft weight
+    weights = np.ones(instance.num_clauses, dtype=np.int64) if weights is None else np.asarray(weights)
+    if top is None:
+        top = int(weights.sum()) + 1
+    with _open(path, "w") as file:
+        for comment in comments:
+            file.write(f"c {comment}\n")
+        file.write(f"p wcnf {instance.num_variables} {instance.num_clauses} {top}\n")
+        file.writelines(_clause_lines(instance, weights))
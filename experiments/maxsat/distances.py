@@ -0,0 +1,141 @@
+import numpy as np
+
+from . import instrument
+
+# Hamming distances between bit-packed configurations: XOR the uint64 words of two blocks of
+# configurations and count the set bits. Distances are folded into running statistics block by
+# block, so the full p x p matrix is never held in memory.
+
+DEFAULT_BLOCK_SIZE = 512
+
+_BYTE_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def popcount(words):
+    # Set bits of every uint64 word; np.bitwise_count needs NumPy 2.0
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+
+def num_words(num_variables):
+    return max(1, -(-num_variables // 64))
+
+
+def pack_values(configs):
+    # (p, num_variables) bools -> (p, words) uint64, bit i of the row = variable i + 1
+    configs = np.asarray(configs, dtype=bool)
+    words = num_words(configs.shape[1])
+    packed = np.zeros((configs.shape[0], words * 8), dtype=np.uint8)
+    packed[:, :(configs.shape[1] + 7) // 8] = np.packbits(configs, axis=1, bitorder="little")
+    return packed.view("<u8")
+
+
+def pack_masks(masks, num_variables):
+    # Python int bitmasks (or Configuration objects) -> (p, words) uint64
+    size = num_words(num_variables) * 8
+    data = b"".join(getattr(mask, "mask", mask).to_bytes(size, "little") for mask in masks)
+    return np.frombuffer(data, dtype="<u8").reshape(-1, size // 8).copy()
+
+
+def distance_block(a, b):
+    # (p, words) x (q, words) -> (p, q) distances
+    return popcount(a[:, np.newaxis, :] ^ b[np.newaxis, :, :]).sum(axis=-1, dtype=np.int64)
+
+
+class DistanceStats:
+    # Count, sum, min, max and an exact histogram (index = distance) of a set of distances
+    def __init__(self, num_variables):
+        self.num_variables = num_variables
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self.histogram = np.zeros(num_variables + 1, dtype=np.int64)
+
+    def add(self, distances):
+        distances = np.asarray(distances).ravel()
+        if distances.size == 0:
+            return
+        self.count += distances.size
+        self.total += int(distances.sum())
+        low, high = int(distances.min()), int(distances.max())
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+        self.histogram += np.bincount(distances, minlength=self.num_variables + 1)
+
+    def update(self, other):
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+        self.histogram += other.histogram
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else float("nan")
+
+    @property
+    def normalized_mean(self):
+        # Mean distance as a fraction of num_variables
+        return self.mean / self.num_variables
+
+    def as_dict(self):
+        return {"count": self.count, "total": self.total, "mean": self.mean if self.count else None,
+                "minimum": self.minimum, "maximum": self.maximum, "histogram": self.histogram.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(len(data["histogram"]) - 1)
+        stats.count = data["count"]
+        stats.total = data["total"]
+        stats.minimum = data["minimum"]
+        stats.maximum = data["maximum"]
+        stats.histogram = np.array(data["histogram"], dtype=np.int64)
+        return stats
+
+    def __repr__(self):
+        return (f"DistanceStats(count={self.count}, mean={self.mean:.3f}, "
+                f"min={self.minimum}, max={self.maximum})")
+
+
+def iter_distance_blocks(a, b=None, block_size=DEFAULT_BLOCK_SIZE):
+    # Yields distance blocks covering every pair once: all (i, j) pairs between a and b,
+    # or the pairs i < j within a when b is None
+    within = b is None
+    if within:
+        b = a
+    for i in range(0, len(a), block_size):
+        rows = a[i:i + block_size]
+        for j in range(i if within else 0, len(b), block_size):
+            block = distance_block(rows, b[j:j + block_size])
+            if within and i == j:
+                block = block[np.triu_indices(len(rows), k=1, m=block.shape[1])]
+            yield block
+
+
+def distance_stats(a, b=None, num_variables=None, block_size=DEFAULT_BLOCK_SIZE):
+    # a, b: packed (p, words) arrays; within-set pairs when b is None
+    if num_variables is None:
+        num_variables = a.shape[1] * 64
+    stats = DistanceStats(num_variables)
+    with instrument.phase("distances"):
+        for block in iter_distance_blocks(a, b, block_size):
+            stats.add(block)
+    instrument.count("distance_pairs", stats.count)
+    return stats
+
+
+def distance_table(groups, num_variables, cross=True, block_size=DEFAULT_BLOCK_SIZE):
+    # groups: {key: packed (p, words) array}, e.g. optima by height.
+    # Returns {(key, key): within-group stats} and, when cross, {(k1, k2): stats} for k1 < k2.
+    keys = sorted(groups)
+    table = {}
+    for index, first in enumerate(keys):
+        table[first, first] = distance_stats(groups[first], None, num_variables, block_size)
+        if cross:
+            for second in keys[index + 1:]:
+                table[first, second] = distance_stats(groups[first], groups[second], num_variables, block_size)
+    return table
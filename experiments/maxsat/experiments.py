@@ -0,0 +1,568 @@
+import logging
+
+import numpy as np
+
+from . import instrument
+from .census import census_feasible, landscape_census
+from .climb import climb_samples
+from .distances import distance_stats, distance_table, pack_masks
+from .family import InstanceFamily, sample_family_batches
+from .generator import InstanceCache, random_instances
+from .flips import FlipEngine
+from .instance import to_bitmask
+from .parallel import DEFAULT_CHUNK_SIZE, chunk_ranges, iter_units
+from .plateau import PlateauCache
+from .registry import OptimaRegistry
+from .rng import chunk_rng, random_configurations
+from .sequential import DEFAULT_CONFIDENCE, DEFAULT_LOOK_SIZE, MeanMonitor, ProportionMonitor, SequentialEstimate
+from .store import unit_key
+from .stream import IntegerHistogram, local_optima_blocks
+from .walks import DEFAULT_MAX_LAG, DEFAULT_STEPS, random_walk_autocorrelation
+
+# Compute side of the six experiments and the random-walk analysis: every function takes its
+# parameters as arguments and returns plain data, so it runs the same from the scripts, the CLI or a
+# headless batch node. Plotting lives in maxsat.plots.
+
+
+def generate_instances(num_variables, num_clauses, num_vars_in_clause, num_of_instances, seed=None, cache=None):
+    # Each instance has its own random stream derived from the run seed (see maxsat.generator);
+    # cache: a directory where instances of a seeded run are kept and reused by later runs
+    instrument.count("instances", num_of_instances)
+    with instrument.phase("generation"):
+        if cache is not None and seed is not None:
+            return InstanceCache(cache).instances(num_variables, num_clauses, num_vars_in_clause, num_of_instances,
+                                                  seed)
+        return random_instances(num_variables, num_clauses, num_vars_in_clause, num_of_instances, seed)
+
+
+def _count_configuration(recorder, engine, optimum):
+    recorder.count("configurations_evaluated")
+    recorder.count("clause_evaluations", engine.num_clauses)
+    recorder.count("neighbor_evaluations", engine.num_variables)
+    recorder.count("local_optima", int(optimum))
+
+
+def is_local_optimum(config, engine, strictly_greater=False):
+    recorder = instrument.active()
+    if recorder is None:
+        engine.reset(config)
+        return engine.is_local_optimum(strictly_greater)
+    with instrument.phase("evaluation"):
+        engine.reset(config)
+    with instrument.phase("classification"):
+        optimum = engine.is_local_optimum(strictly_greater)
+    _count_configuration(recorder, engine, optimum)
+    return optimum
+
+
+def classify_configuration(config, engine):
+    # Neighborhood of config (height, strict and non-strict optimality, equal, improving and worsening
+    # neighbor counts) from one evaluation of its flips
+    recorder = instrument.active()
+    if recorder is None:
+        engine.reset(config)
+        return engine.classify()
+    with instrument.phase("evaluation"):
+        engine.reset(config)
+    with instrument.phase("classification"):
+        neighborhood = engine.classify()
+    _count_configuration(recorder, engine, neighborhood.non_strict)
+    return neighborhood
+
+
+# Exp1 - share of configurations that are local optima
+
+OPTIMALITY = {"strict": True, "non_strict": False}
+
+
+def estimate_local_optima_ratios(instance, num_configurations, rng=None, precision=None,
+                                 confidence=DEFAULT_CONFIDENCE, method="wilson", relative=False, registry=None):
+    # Shares of strict and non-strict local optima as {"strict": ..., "non_strict": ...} SequentialEstimates,
+    # both from the same configurations: every block is evaluated once and classified both ways. With a
+    # precision, configurations are drawn in looks of DEFAULT_LOOK_SIZE until both intervals' half-widths
+    # reach it; num_configurations is the budget. The non-strict optima found are added to the registry,
+    # if one is given (the strict ones are among them).
+    if census_feasible(instance.num_variables, num_configurations):
+        # Enumerating all 2^n configurations costs no more than sampling: the shares are exact
+        census = landscape_census(instance, collect_optima=registry is not None)
+        if registry is not None:
+            registry.add_many(*census.optima_for(False))
+        estimates = {}
+        for key, strictly_greater in OPTIMALITY.items():
+            share = census.fraction(strictly_greater)
+            estimates[key] = SequentialEstimate(share, share, share, census.num_configurations, "census",
+                                                num_configurations)
+        return estimates
+    monitors = {key: ProportionMonitor(precision, confidence, method, relative) for key in OPTIMALITY}
+    look_size = None if precision is None else DEFAULT_LOOK_SIZE
+    for configs, result, optima in local_optima_blocks(instance, num_configurations, rng=rng, batch_size=look_size):
+        if registry is not None:
+            registry.add_configurations(configs[optima], result.heights[optima])
+        monitors["strict"].update(np.count_nonzero(result.strict), len(result))
+        monitors["non_strict"].update(np.count_nonzero(optima), len(result))
+        if all(monitor.converged() for monitor in monitors.values()):
+            break
+    return {key: monitor.result(num_configurations) for key, monitor in monitors.items()}
+
+
+def family_local_optima_ratios(family, num_configurations, rng=None, precision=None,
+                               confidence=DEFAULT_CONFIDENCE, method="wilson", relative=False, registries=None):
+    # estimate_local_optima_ratios for every instance of an InstanceFamily, on configurations shared by
+    # the family; with a precision, sampling stops once the intervals of every instance are that narrow
+    monitors = [{key: ProportionMonitor(precision, confidence, method, relative) for key in OPTIMALITY}
+                for _ in range(family.num_instances)]
+    look_size = None if precision is None else DEFAULT_LOOK_SIZE
+    for configs, result in sample_family_batches(family, num_configurations, rng, batch_size=look_size):
+        instrument.count("local_optima", int(np.count_nonzero(result.non_strict)))
+        for index, instance_monitors in enumerate(monitors):
+            optima = result.non_strict[index]
+            if registries is not None:
+                registries[index].add_configurations(configs[optima], result.heights[index, optima])
+            instance_monitors["strict"].update(np.count_nonzero(result.strict[index]), len(result))
+            instance_monitors["non_strict"].update(np.count_nonzero(optima), len(result))
+        if all(monitor.converged() for instance_monitors in monitors for monitor in instance_monitors.values()):
+            break
+    return [{key: monitor.result(num_configurations) for key, monitor in instance_monitors.items()}
+            for instance_monitors in monitors]
+
+
+def calculate_local_optima_estimates(instances, num_configurations, seed=None, precision=None,
+                                     confidence=DEFAULT_CONFIDENCE, method="wilson", relative=False, stacked=False):
+    # {"strict": [SequentialEstimate per instance], "non_strict": [...]}. stacked: evaluate the
+    # instances (one n, m, k) together as an InstanceFamily on shared configurations from the first
+    # instance's stream; families small enough for a census are still enumerated one by one.
+    estimates = {key: [] for key in OPTIMALITY}
+    registries = [OptimaRegistry(instance.num_variables) for instance in instances]
+    if stacked and instances and not census_feasible(instances[0].num_variables, num_configurations):
+        results = family_local_optima_ratios(InstanceFamily(instances), num_configurations, chunk_rng(seed, 0),
+                                             precision, confidence, method, relative, registries)
+    else:
+        results = (estimate_local_optima_ratios(instance, num_configurations, chunk_rng(seed, idx), precision,
+                                                confidence, method, relative, registry)
+                   for idx, (instance, registry) in enumerate(zip(instances, registries)))
+    for idx, (ratios, registry) in enumerate(zip(results, registries)):
+        for key, estimate in ratios.items():
+            estimates[key].append(estimate)
+        strict, non_strict = ratios["strict"], ratios["non_strict"]
+        logging.info(f"Instance {idx + 1}: {strict.estimate * 100:.4f}% strict "
+                     f"[{strict.low * 100:.4f}%, {strict.high * 100:.4f}%], {non_strict.estimate * 100:.4f}% "
+                     f"non-strict [{non_strict.low * 100:.4f}%, {non_strict.high * 100:.4f}%] local optima "
+                     f"from {non_strict.samples} configurations ({non_strict.stopped}), "
+                     f"{registry.unique} distinct out of {registry.total}")
+    logging.info(f"Configurations used: {sum(estimate.samples for estimate in estimates['non_strict'])} "
+                 f"(budget {num_configurations * len(instances)})")
+    return estimates
+
+
+def calculate_local_optima_percentages(instances, num_configurations, seed=None, precision=None,
+                                       confidence=DEFAULT_CONFIDENCE, method="wilson", relative=False, stacked=False):
+    # {"strict": [share per instance], "non_strict": [...]}
+    estimates = calculate_local_optima_estimates(instances, num_configurations, seed, precision, confidence,
+                                                 method, relative, stacked)
+    return {key: [estimate.estimate for estimate in values] for key, values in estimates.items()}
+
+
+# Exp2 - distribution of local optima by height
+
+def sample_optimum_heights(instance, num_configurations, strictly_greater, rng=None, backend="numpy",
+                           precision=None, confidence=DEFAULT_CONFIDENCE, relative=False, registry=None):
+    # IntegerHistogram of the heights of the local optima among up to num_configurations samples and a
+    # SequentialEstimate of their mean. With a precision, sampling stops once the interval on the
+    # mean height is that narrow. Heights keep repeated optima (they are samples of the landscape);
+    # the registry, if given, tells distinct optima apart.
+    monitor = MeanMonitor(precision, confidence, relative)
+    histogram = IntegerHistogram(np.zeros(instance.num_clauses + 1))
+    look_size = None if precision is None else DEFAULT_LOOK_SIZE
+    # Random configurations are evaluated in blocks together with all their neighbors
+    for configs, result, optima in local_optima_blocks(instance, num_configurations, strictly_greater, rng, backend,
+                                                       look_size):
+        heights = result.heights[optima]
+        if registry is not None:
+            registry.add_configurations(configs[optima], heights)
+        histogram.update(heights)
+        monitor.update(heights, len(result))
+        if monitor.converged():
+            break
+        instrument.progress("Instance", monitor.samples, num_configurations)
+    return histogram, monitor.result(num_configurations)
+
+
+def calculate_local_optima_distribution(instance, num_configurations, strictly_greater, backend="numpy", rng=None,
+                                        precision=None, confidence=DEFAULT_CONFIDENCE, relative=False):
+    # height_counts[h] = number of local optima of height h among num_configurations samples
+    if census_feasible(instance.num_variables, num_configurations):
+        # Exhaustive enumeration: every local optimum is counted exactly once
+        census = landscape_census(instance, collect_optima=False)
+        height_counts = census.height_histogram(strictly_greater)
+        logging.info(f"Instance completed: exact census of {census.num_configurations} configurations, "
+                     f"{int(height_counts.sum())} local optima")
+        return height_counts
+
+    registry = OptimaRegistry(instance.num_variables)
+    histogram, estimate = sample_optimum_heights(instance, num_configurations, strictly_greater, rng, backend,
+                                                 precision, confidence, relative, registry)
+    logging.info(f"Instance completed: {histogram.total} local optima ({registry.unique} distinct) found out of "
+                 f"{estimate.samples} configurations, mean height {estimate.estimate:.3f} [{estimate.low:.3f}, "
+                 f"{estimate.high:.3f}] ({estimate.stopped})")
+    return histogram.counts
+
+
+def calculate_height_distribution(instances, num_configurations, strictly_greater, backend="numpy", num_workers=1,
+                                  chunk_size=DEFAULT_CHUNK_SIZE, seed=None, store=None, precision=None,
+                                  confidence=DEFAULT_CONFIDENCE, relative=False):
+    # Returns height_counts[h] = number of local optima of height h over all instances. Work units
+    # return their height counts, never the heights themselves; with a ShardStore every unit's counts
+    # are also written to disk as it finishes, and units already in the store are read back instead
+    # of being run again.
+    # Work unit = (instance, range of configurations); a census is not split, and neither is an
+    # instance sampled until a precision on its mean height is reached
+    num_clauses = max((instance.num_clauses for instance in instances), default=0)
+    units = []
+    for idx, instance in enumerate(instances):
+        if census_feasible(instance.num_variables, num_configurations) or precision is not None:
+            units.append((idx, 0, num_configurations))
+        else:
+            units.extend((idx, start, stop) for start, stop in chunk_ranges(num_configurations, chunk_size))
+    height_counts = IntegerHistogram(np.zeros(num_clauses + 1))
+    # A store that does not record strictly_greater may hold counts of either kind of optimum
+    if store is not None and store.parameters.get("strictly_greater") != strictly_greater:
+        raise ValueError(f"Store {store.directory} holds results for strictly_greater="
+                         f"{store.parameters.get('strictly_greater')}, not {strictly_greater}")
+
+    pending = []
+    for idx, start, stop in units:
+        key = unit_key(idx, start // chunk_size)
+        if store is not None and store.is_done(key):
+            height_counts.add_counts(store.read(key)["height_counts"])
+        else:
+            pending.append((idx, start, stop))
+    if len(pending) < len(units):
+        logging.info(f"{len(units) - len(pending)}/{len(units)} work units restored from {store.directory}")
+
+    results = iter_units(
+        calculate_local_optima_distribution,
+        [(instances[idx], stop - start, strictly_greater, backend, chunk_rng(seed, idx, start // chunk_size),
+          precision, confidence, relative) for idx, start, stop in pending],
+        num_workers,
+    )
+    # Results arrive in unit order
+    for (idx, start, stop), unit_counts in zip(pending, results):
+        if store is not None:
+            store.write(unit_key(idx, start // chunk_size), height_counts=unit_counts)
+        height_counts.add_counts(unit_counts)
+        if stop == num_configurations:
+            logging.info(f"Instance {idx + 1}/{len(instances)} completed")
+    logging.info(f"Total local optima found: {height_counts.total}")
+    return height_counts.counts
+
+
+# Exp3 - summary statistics of local optima heights
+
+def calculate_height_histograms(instances, num_configurations, seed=None, precision=None,
+                                confidence=DEFAULT_CONFIDENCE, relative=False, stacked=False):
+    # (IntegerHistogram of local optima heights per instance, SequentialEstimates); the estimates are
+    # only there with a precision, which stops each instance once its mean height is that well known.
+    # stacked: evaluate the instances together as an InstanceFamily (see calculate_local_optima_estimates)
+    if stacked and instances:
+        registries = [OptimaRegistry(instance.num_variables) for instance in instances]
+        results = family_optimum_heights(InstanceFamily(instances), num_configurations, chunk_rng(seed, 0),
+                                         precision, confidence, relative, registries)
+        for idx, ((_, estimate), registry) in enumerate(zip(results, registries)):
+            logging.info(f"Instance {idx + 1}: mean height {estimate.estimate:.3f} [{estimate.low:.3f}, "
+                         f"{estimate.high:.3f}] from {estimate.samples} configurations ({estimate.stopped}), "
+                         f"{registry.unique} distinct optima out of {registry.total}")
+        histograms = [histogram for histogram, _ in results]
+        return histograms, [] if precision is None else [estimate for _, estimate in results]
+    if precision is not None:
+        results = calculate_height_estimates(instances, num_configurations, seed, precision, confidence, relative)
+        return [histogram for histogram, _ in results], [estimate for _, estimate in results]
+    histograms = []
+    for idx, instance in enumerate(instances):
+        registry = OptimaRegistry(instance.num_variables)
+        histograms.append(instance_height_histogram(instance, num_configurations, chunk_rng(seed, idx), registry))
+        logging.info(f"Instance {idx + 1}: {registry.unique} distinct local optima out of {registry.total}")
+    return histograms, []
+
+
+def instance_height_histogram(instance, num_configurations, rng=None, registry=None):
+    # Heights of the non-strict local optima among num_configurations samples
+    histogram = IntegerHistogram(np.zeros(instance.num_clauses + 1))
+    for configs, result, optima in local_optima_blocks(instance, num_configurations, rng=rng):
+        if registry is not None:
+            registry.add_configurations(configs[optima], result.heights[optima])
+        histogram.update(result.heights[optima])
+    return histogram
+
+
+def family_optimum_heights(family, num_configurations, rng=None, precision=None, confidence=DEFAULT_CONFIDENCE,
+                           relative=False, registries=None):
+    # sample_optimum_heights (non-strict optima) for every instance of an InstanceFamily, on shared
+    # configurations; with a precision, sampling stops once every instance's mean height is that well known
+    monitors = [MeanMonitor(precision, confidence, relative) for _ in range(family.num_instances)]
+    histograms = [IntegerHistogram(np.zeros(family.num_clauses + 1)) for _ in range(family.num_instances)]
+    look_size = None if precision is None else DEFAULT_LOOK_SIZE
+    for configs, result in sample_family_batches(family, num_configurations, rng, batch_size=look_size):
+        instrument.count("local_optima", int(np.count_nonzero(result.non_strict)))
+        for index, (monitor, histogram) in enumerate(zip(monitors, histograms)):
+            optima = result.non_strict[index]
+            heights = result.heights[index, optima]
+            if registries is not None:
+                registries[index].add_configurations(configs[optima], heights)
+            histogram.update(heights)
+            monitor.update(heights, len(result))
+        if all(monitor.converged() for monitor in monitors):
+            break
+        instrument.progress("Family", monitors[0].samples, num_configurations)
+    return [(histogram, monitor.result(num_configurations)) for histogram, monitor in zip(histograms, monitors)]
+
+
+def calculate_height_estimates(instances, num_configurations, seed=None, precision=None,
+                               confidence=DEFAULT_CONFIDENCE, relative=False, strictly_greater=False):
+    # [(IntegerHistogram of local optima heights, SequentialEstimate of their mean)] per instance,
+    # sampling each instance until the mean height is known to the given precision or
+    # num_configurations are used
+    results = []
+    for idx, instance in enumerate(instances):
+        registry = OptimaRegistry(instance.num_variables)
+        histogram, estimate = sample_optimum_heights(instance, num_configurations, strictly_greater,
+                                                     chunk_rng(seed, idx), precision=precision,
+                                                     confidence=confidence, relative=relative, registry=registry)
+        logging.info(f"Instance {idx + 1}: mean height {estimate.estimate:.3f} [{estimate.low:.3f}, "
+                     f"{estimate.high:.3f}] from {estimate.samples} configurations ({estimate.stopped}), "
+                     f"{registry.unique} distinct optima out of {registry.total}")
+        results.append((histogram, estimate))
+    return results
+
+
+def height_metrics(heights):
+    # Summary of raw heights; IntegerHistogram.metrics() gives the same from counts
+    return IntegerHistogram.of(heights).metrics()
+
+
+# Exp4 - share of same-height neighbors of local optima
+
+def local_optima_neighbor_counts(instance, num_configurations, rng=None, backend="numpy"):
+    # (IntegerHistogram of local optima heights, IntegerHistogram of their numbers of same-height
+    # neighbors) among num_configurations samples; same-height neighbors are the flips with zero
+    # height change
+    heights = IntegerHistogram(np.zeros(instance.num_clauses + 1))
+    equal_neighbors = IntegerHistogram(np.zeros(instance.num_variables + 1))
+    for _, result, optima in local_optima_blocks(instance, num_configurations, rng=rng, backend=backend):
+        heights.update(result.heights[optima])
+        equal_neighbors.update(result.equal_neighbors[optima])
+    return heights, equal_neighbors
+
+
+def calculate_neighbor_percentages(instances, num_configurations, num_workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                                   seed=None):
+    # (heights, same-height neighbor counts) of the local optima of all instances, as IntegerHistograms.
+    # Each instance is split into ranges of configurations whose histograms are merged as they arrive.
+    # Shares of same-height neighbors are counts / n, so the instances should have one n.
+    if len({instance.num_variables for instance in instances}) > 1:
+        logging.warning("Instances with different numbers of variables: neighbor counts are merged as they are")
+    heights = IntegerHistogram()
+    equal_neighbors = IntegerHistogram()
+    units = [(instance, stop - start, chunk_rng(seed, idx, start // chunk_size))
+             for idx, instance in enumerate(instances)
+             for start, stop in chunk_ranges(num_configurations, chunk_size)]
+    for unit_heights, unit_neighbors in iter_units(local_optima_neighbor_counts, units, num_workers):
+        heights.merge(unit_heights)
+        equal_neighbors.merge(unit_neighbors)
+    return heights, equal_neighbors
+
+
+# Exp5 - same-height neighbors of 100 local optima per instance
+
+METRIC_NAMES = {
+    "mean": "Average Number of Same-Level Neighbors",
+    "std_dev": "Standard Deviation of Same-Level Neighbors",
+    "median": "Median Number of Same-Level Neighbors",
+    "mad": "Median Absolute Deviation of Same-Level Neighbors",
+}
+# Reported next to the metrics: distinct optima used and all optima found, repeats included
+OPTIMA_COUNTS = ("unique_optima", "total_optima")
+# With plateau analysis: the equal-height region around each optimum, flood-filled up to a size cap
+PLATEAU_METRICS = {
+    "mean_plateau_size": "Average Plateau Size of Local Optima",
+    "mean_plateau_diameter": "Average Plateau Diameter of Local Optima",
+    "plateau_exit_share": "Share of Local Optima on Plateaus with an Exit",
+    "plateau_truncated_share": "Share of Plateaus Cut at the Size Cap",
+}
+
+
+def calculate_metrics_for_instance(instance, num_configurations, sampling="uniform", rng=None, required_count=100,
+                                   plateau_size=None):
+    # Metrics over required_count distinct local optima: an optimum found again adds no new sample.
+    # With a plateau_size, the plateau of every optimum is explored up to that many configurations.
+    engine = FlipEngine(instance)
+    registry = OptimaRegistry(instance.num_variables)
+    neighbors_counts = []
+    optima = []
+    rng = rng or np.random.default_rng()
+
+    if sampling in ("steepest", "first"):
+        # Hill climbing from random starts: every finished climb ends in a local optimum
+        for result in climb_samples(instance, num_configurations, strategy=sampling, rng=rng):
+            if result.converged and registry.add(to_bitmask(result.optimum), result.height):
+                neighbors_counts.append(result.equal_neighbors)
+                optima.append(result.optimum)
+                if len(neighbors_counts) >= required_count:
+                    break
+    else:
+        for config in random_configurations(rng, num_configurations, instance.num_variables):
+            neighborhood = classify_configuration(config, engine)
+            if neighborhood.non_strict and registry.add(to_bitmask(config), neighborhood.height):
+                neighbors_counts.append(neighborhood.equal)
+                optima.append(config)
+                if len(neighbors_counts) >= required_count:
+                    break
+
+    if len(neighbors_counts) < required_count:
+        raise ValueError(f"Did not find {required_count} distinct local optima ({registry.total} found in all).")
+
+    median = np.median(neighbors_counts)
+    return {
+        "mean": float(np.mean(neighbors_counts)),
+        "std_dev": float(np.std(neighbors_counts)),
+        "median": float(median),
+        # Median absolute deviation (scipy.stats.median_abs_deviation with scale=1)
+        "mad": float(np.median(np.abs(np.asarray(neighbors_counts) - median))),
+        "unique_optima": registry.unique,
+        "total_optima": registry.total,
+        **({} if plateau_size is None else plateau_metrics(engine, optima, plateau_size)),
+    }
+
+
+def plateau_metrics(engine, optima, max_size):
+    # PLATEAU_METRICS over the plateaus of the given optima; optima sharing a plateau explore it once
+    cache = PlateauCache(engine, max_size)
+    plateaus = [cache.explore(optimum) for optimum in optima]
+    return {
+        "mean_plateau_size": float(np.mean([plateau.size for plateau in plateaus])),
+        "mean_plateau_diameter": float(np.mean([plateau.diameter for plateau in plateaus])),
+        "plateau_exit_share": float(np.mean([plateau.has_exit for plateau in plateaus])),
+        "plateau_truncated_share": float(np.mean([plateau.truncated for plateau in plateaus])),
+    }
+
+
+def calculate_all_metrics(instances, num_configurations, sampling="uniform", num_workers=1, seed=None,
+                          required_count=100, plateau_size=None):
+    # {metric or optima count: [value per instance]}, plus the errors of instances with too few optima
+    keys = (*METRIC_NAMES, *OPTIMA_COUNTS) + (() if plateau_size is None else tuple(PLATEAU_METRICS))
+    all_metrics = {key: [] for key in keys}
+    errors = []
+    units = [(instance, num_configurations, sampling, chunk_rng(seed, idx), required_count, plateau_size)
+             for idx, instance in enumerate(instances)]
+    # Too few optima is a property of the instance, not a transient failure: no retries
+    for idx, metrics in enumerate(iter_units(calculate_metrics_for_instance, units, num_workers, retries=0,
+                                             errors="return")):
+        if isinstance(metrics, ValueError):
+            errors.append(metrics)
+            continue
+        logging.info(f"Instance {idx + 1}: {metrics['unique_optima']} distinct local optima out of "
+                     f"{metrics['total_optima']} found")
+        for key in all_metrics:
+            all_metrics[key].append(metrics[key])
+    return all_metrics, errors
+
+
+# Exp6 - Hamming distances between local optima of the same height
+
+def sample_local_optima(instance, num_configurations, sampling, rng):
+    # Yields (config, height) for local optima: rejection sampling or hill climbing from random starts
+    if sampling in ("steepest", "first"):
+        for result in climb_samples(instance, num_configurations, strategy=sampling, rng=rng):
+            if result.converged:
+                yield result.optimum, result.height
+        return
+    engine = FlipEngine(instance)
+    for config in random_configurations(rng, num_configurations, instance.num_variables):
+        if is_local_optimum(config, engine):
+            yield config, engine.height
+
+
+def find_local_optima_by_height(instance, num_configurations, required_count=100, sampling="uniform", rng=None,
+                                registry=None):
+    # {height: distinct optima as Configurations}; sampling stops once a height has required_count of them.
+    # An optimum found again only adds a hit in the registry.
+    registry = registry if registry is not None else OptimaRegistry(instance.num_variables)
+    counts = {}
+    rng = rng or np.random.default_rng()
+    for config, height in sample_local_optima(instance, num_configurations, sampling, rng):
+        if not registry.add(to_bitmask(config), height):
+            continue
+        counts[height] = counts.get(height, 0) + 1
+        if counts[height] == required_count:
+            break
+    return {height: registry.configurations(rows) for height, rows in registry.rows_by_height().items()}
+
+
+def calculate_hamming_distances(optima):
+    # Pairwise distances of bitmask optima, streamed block by block into running statistics
+    expected_size = len(optima[0])
+    for opt in optima:
+        if len(opt) != expected_size:
+            raise ValueError("Inconsistent sizes in local optima configurations")
+    return distance_stats(pack_masks(optima, expected_size), num_variables=expected_size)
+
+
+def instance_optima_distances(instance, num_configurations, sampling="uniform", rng=None, required_count=100,
+                              min_count=30):
+    # ({height: mean normalized distance between its distinct optima}, registry summary,
+    # {(height, height): DistanceStats} within and between heights); distances are computed on the
+    # registry's packed rows directly
+    registry = OptimaRegistry(instance.num_variables)
+    find_local_optima_by_height(instance, num_configurations, required_count, sampling, rng, registry)
+    groups = {height: registry.masks[rows] for height, rows in registry.rows_by_height().items()
+              if len(rows) >= min_count}
+    table = distance_table(groups, instance.num_variables)
+    distance_means = {height: table[height, height].normalized_mean for height in groups}
+    return distance_means, registry.summary(), table
+
+
+def distance_table_rows(table):
+    # {(height, height): DistanceStats} -> JSON-ready rows in height order
+    return [dict(heights=list(key), **table[key].as_dict()) for key in sorted(table)]
+
+
+def instance_distance_means(instance, num_configurations, sampling="uniform", rng=None, required_count=100,
+                            min_count=30):
+    return instance_optima_distances(instance, num_configurations, sampling, rng, required_count, min_count)[0]
+
+
+def analyze_optima(instances, num_configurations, sampling="uniform", num_workers=1, seed=None, required_count=100):
+    # Distance means by height over all instances, the registry summary of every instance and the
+    # distance statistics of every height pair, merged over instances
+    distance_means_by_height = {}
+    summaries = []
+    table = {}
+    # Instances run in parallel; results are merged in instance order
+    units = [(instance, num_configurations, sampling, chunk_rng(seed, idx), required_count)
+             for idx, instance in enumerate(instances)]
+    for idx, (distance_means, summary, stats) in enumerate(iter_units(instance_optima_distances, units,
+                                                                      num_workers)):
+        logging.info(f"Instance {idx + 1}: {summary['unique']} distinct local optima out of {summary['total']} found")
+        distance_means_by_height.update(distance_means)
+        summaries.append(summary)
+        for key, pair_stats in stats.items():
+            table[key] = table[key].update(pair_stats) if key in table else pair_stats
+    return distance_means_by_height, summaries, table
+
+
+def analyze_optima_heights(instances, num_configurations, sampling="uniform", num_workers=1, seed=None,
+                           required_count=100):
+    return analyze_optima(instances, num_configurations, sampling, num_workers, seed, required_count)[0]
+
+
+# Random-walk autocorrelation - ruggedness of the landscape along walks of single flips
+
+def calculate_autocorrelations(instances, num_walks, steps=DEFAULT_STEPS, max_lag=DEFAULT_MAX_LAG, num_workers=1,
+                               seed=None):
+    # AutocorrelationEstimate of every instance. The walks of an instance run side by side in one
+    # process; instances run in parallel.
+    units = [(instance, num_walks, steps, max_lag, chunk_rng(seed, idx)) for idx, instance in enumerate(instances)]
+    estimates = []
+    for idx, estimate in enumerate(iter_units(random_walk_autocorrelation, units, num_workers)):
+        logging.info(f"Instance {idx + 1}: correlation length {estimate.correlation_length:.4g}")
+        estimates.append(estimate)
+    return estimates
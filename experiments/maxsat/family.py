@@ -0,0 +1,149 @@
+import numpy as np
+
+from . import instrument
+from .batch import DEFAULT_MEMORY_BUDGET, BatchResult
+from .rng import random_configurations
+
+# A family of instances with one (n, m, k), stacked into a (num_instances, m, k) literal tensor and
+# evaluated together: one block of configurations is scored against every instance in one call, so the
+# configurations are drawn once and the interpreter overhead of a call is paid once for the family.
+# The evaluation works with the configuration as last axis: literal truth (num_instances, m, k, B),
+# true-literal counts (num_instances, m, B), and the make/break gain of every literal (the rule of
+# FlipEngine) is summed per variable by a batched product with a 0/1 literal -> variable matrix
+# (num_instances, n, m * k), exact in float32 for these small integers. The block is cut into
+# sub-blocks of SUB_BLOCK_SIZE configurations so the literal tables stay in cache; larger sub-blocks
+# are memory bound and no faster than one instance at a time.
+# Results have the instance as leading axis: heights (num_instances, B), deltas (num_instances, B, n).
+# Every instance sees the same configurations, so per-instance estimates from a family are correlated
+# across instances (each one on its own is still a uniform sample).
+
+SUB_BLOCK_SIZE = 64
+
+
+class InstanceFamily:
+    def __init__(self, instances):
+        instances = list(instances)
+        if not instances:
+            raise ValueError("A family needs at least one instance")
+        shapes = {(instance.num_variables, instance.num_clauses, instance.clause_width) for instance in instances}
+        if len(shapes) > 1:
+            raise ValueError(f"Instances of a family need one (n, m, k), got {sorted(shapes)}")
+        self.instances = instances
+        self.num_variables = instances[0].num_variables
+        # (num_instances, m, k) signed 1-based literals, 0 for padding
+        self.literals = np.stack([instance.literals for instance in instances])
+        # 0-based variable of every literal; padding points at an extra always-False row
+        self.variables = np.abs(self.literals).astype(np.intp) - 1
+        self.variables[self.literals == 0] = self.num_variables
+        self.signs = (self.literals >= 0)[..., None]
+        # scatter[j, v, l] = 1 when literal l of instance j (clause-major) is on variable v
+        literal_count = self.num_clauses * self.clause_width
+        self.scatter = np.zeros((self.num_instances, self.num_variables + 1, literal_count), dtype=np.float32)
+        self.scatter[np.arange(self.num_instances)[:, None], self.variables.reshape(self.num_instances, -1),
+                     np.arange(literal_count)] = 1
+        self.scatter = self.scatter[:, :self.num_variables]
+
+    @property
+    def num_instances(self):
+        return self.literals.shape[0]
+
+    @property
+    def num_clauses(self):
+        return self.literals.shape[1]
+
+    @property
+    def clause_width(self):
+        return self.literals.shape[2]
+
+    def _literal_values(self, configs):
+        # (B, n) bools -> (num_instances, m, k, B) literal truth table
+        values = np.zeros((self.num_variables + 1, len(configs)), dtype=bool)
+        values[:-1] = np.asarray(configs, dtype=bool).T
+        return values[self.variables] == self.signs
+
+    def _true_counts(self, literal_values):
+        counts = literal_values[:, :, 0].view(np.int8).copy()
+        for position in range(1, self.clause_width):
+            counts += literal_values[:, :, position].view(np.int8)
+        return counts
+
+    def heights(self, configs):
+        heights = np.zeros((self.num_instances, len(configs)), dtype=np.intp)
+        for start in range(0, len(configs), SUB_BLOCK_SIZE):
+            rows = slice(start, start + SUB_BLOCK_SIZE)
+            heights[:, rows] = np.count_nonzero(self._true_counts(self._literal_values(configs[rows])), axis=1)
+        return heights
+
+    def evaluate_block(self, configs):
+        # -> (heights (num_instances, B), deltas (num_instances, B, n))
+        heights = np.zeros((self.num_instances, len(configs)), dtype=np.intp)
+        deltas = np.zeros((self.num_instances, len(configs), self.num_variables), dtype=np.int32)
+        for start in range(0, len(configs), SUB_BLOCK_SIZE):
+            rows = slice(start, start + SUB_BLOCK_SIZE)
+            literal_values = self._literal_values(configs[rows])
+            counts = self._true_counts(literal_values)
+            heights[:, rows] = np.count_nonzero(counts, axis=1)
+            # Flipping a literal's variable makes its clause when no literal is true and breaks it
+            # when the literal is the only true one
+            counts = counts[:, :, None]
+            gain = (counts == 0).view(np.int8) - (literal_values & (counts == 1)).view(np.int8)
+            gain = gain.reshape(self.num_instances, -1, gain.shape[-1]).astype(np.float32)
+            deltas[:, rows] = np.matmul(self.scatter, gain).transpose(0, 2, 1)
+        return heights, deltas
+
+    def __len__(self):
+        return self.num_instances
+
+    def __getitem__(self, index):
+        return self.instances[index]
+
+    def __repr__(self):
+        return (f"InstanceFamily(num_instances={self.num_instances}, num_variables={self.num_variables}, "
+                f"num_clauses={self.num_clauses}, clause_width={self.clause_width})")
+
+
+class FamilyResult(BatchResult):
+    # BatchResult with a leading instance axis; len() is the number of configurations
+    def __len__(self):
+        return self.heights.shape[-1]
+
+    @property
+    def num_instances(self):
+        return self.heights.shape[0]
+
+    def __getitem__(self, index):
+        # The BatchResult of one instance
+        return BatchResult(self.heights[index], self.deltas[index])
+
+
+def family_batch_size(family, memory_budget=DEFAULT_MEMORY_BUDGET):
+    # Configurations per block: the results (heights and int32 deltas of every instance) fill the
+    # budget, the sub-block temporaries are small next to them
+    row_bytes = family.num_instances * (4 * family.num_variables + 8 + 2 * family.num_clauses)
+    return max(1, memory_budget // row_bytes)
+
+
+def evaluate_family(family, configs):
+    # configs: (B, n) bools -> FamilyResult of every instance on the same configurations
+    configs = np.asarray(configs, dtype=bool)
+    recorder = instrument.active()
+    if recorder is not None:
+        evaluations = len(configs) * family.num_instances
+        recorder.count("configurations_evaluated", evaluations)
+        recorder.count("clause_evaluations", evaluations * family.num_clauses)
+        recorder.count("neighbor_evaluations", evaluations * family.num_variables)
+    with instrument.phase("evaluation"):
+        return FamilyResult(*family.evaluate_block(configs))
+
+
+def sample_family_batches(family, num_configurations, rng=None, memory_budget=DEFAULT_MEMORY_BUDGET,
+                          batch_size=None):
+    # Uniform random configurations shared by the whole family, drawn and evaluated one block at a time
+    if rng is None:
+        rng = np.random.default_rng()
+    memory_batch_size = family_batch_size(family, memory_budget)
+    batch_size = memory_batch_size if batch_size is None else min(batch_size, memory_batch_size)
+    for start in range(0, num_configurations, batch_size):
+        size = min(batch_size, num_configurations - start)
+        configs = random_configurations(rng, size, family.num_variables)
+        yield configs, evaluate_family(family, configs)
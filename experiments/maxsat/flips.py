@@ -0,0 +1,130 @@
+import numpy as np
+
+
+class Neighborhood:
+    # One configuration's single-flip neighborhood: its height and how many neighbors are equal,
+    # higher (improving) and lower (worsening)
+    __slots__ = ("height", "equal", "improving", "worsening")
+
+    def __init__(self, height, equal, improving, worsening):
+        self.height = height
+        self.equal = equal
+        self.improving = improving
+        self.worsening = worsening
+
+    @property
+    def strict(self):
+        return self.improving == 0 and self.equal == 0
+
+    @property
+    def non_strict(self):
+        return self.improving == 0
+
+    def is_local_optimum(self, strictly_greater):
+        return self.strict if strictly_greater else self.non_strict
+
+    def __repr__(self):
+        return (f"Neighborhood(height={self.height}, equal={self.equal}, improving={self.improving}, "
+                f"worsening={self.worsening})")
+
+
+class FlipEngine:
+    # Keeps the number of true literals per clause for the current configuration and a
+    # variable -> clause occurrence index, so the height change of a single-variable flip
+    # is read off the clauses that contain the variable instead of rescanning all clauses.
+    def __init__(self, instance):
+        self.instance = instance
+        self.num_variables = instance.num_variables
+        self.num_clauses = instance.num_clauses
+
+        clause_ids, _ = np.nonzero(instance.literals)
+        variables = instance.variables[instance.literals != 0]
+        signs = instance.signs[instance.literals != 0]
+
+        # Occurrences sorted by variable: occurrences of v are offsets[v]:offsets[v + 1]
+        order = np.argsort(variables, kind="stable")
+        self.occurrence_clauses = clause_ids[order].astype(np.intp)
+        self.occurrence_variables = variables[order]
+        self.occurrence_signs = signs[order]
+        self.offsets = np.zeros(self.num_variables + 1, dtype=np.intp)
+        np.cumsum(np.bincount(self.occurrence_variables, minlength=self.num_variables),
+                  out=self.offsets[1:])
+
+        self.values = np.zeros(self.num_variables, dtype=bool)
+        self.true_counts = np.zeros(self.num_clauses, dtype=np.int32)
+        self.height = 0
+
+    def reset(self, values):
+        self.values = np.array(values, dtype=bool)
+        literal_true = self.values[self.occurrence_variables] == self.occurrence_signs
+        self.true_counts = np.bincount(self.occurrence_clauses, weights=literal_true,
+                                       minlength=self.num_clauses).astype(np.int32)
+        self.height = int(np.count_nonzero(self.true_counts))
+        return self.height
+
+    def deltas(self):
+        # Height change of flipping each variable: clauses it would make minus clauses it would break
+        literal_true = self.values[self.occurrence_variables] == self.occurrence_signs
+        counts = self.true_counts[self.occurrence_clauses]
+        make = counts == 0
+        broken = literal_true & (counts == 1)
+        gain = make.astype(np.int32) - broken
+        return np.bincount(self.occurrence_variables, weights=gain,
+                           minlength=self.num_variables).astype(np.int32)
+
+    def delta(self, var):
+        occurrences = slice(self.offsets[var], self.offsets[var + 1])
+        counts = self.true_counts[self.occurrence_clauses[occurrences]]
+        literal_true = self.occurrence_signs[occurrences] == self.values[var]
+        return int(np.count_nonzero(counts == 0) - np.count_nonzero(literal_true & (counts == 1)))
+
+    def flip(self, var):
+        occurrences = slice(self.offsets[var], self.offsets[var + 1])
+        clauses = self.occurrence_clauses[occurrences]
+        literal_true = self.occurrence_signs[occurrences] == self.values[var]
+        before = self.true_counts[clauses]
+        after = before + np.where(literal_true, -1, 1)
+        self.true_counts[clauses] = after
+        delta = int(np.count_nonzero(after) - np.count_nonzero(before))
+        self.values[var] = not self.values[var]
+        self.height += delta
+        return delta
+
+    def batch_true_counts(self, values):
+        # values: (B, num_variables) -> (B, num_clauses) true-literal counts
+        return self.instance.literal_values(values).sum(axis=-1, dtype=np.int16)
+
+    def batch_deltas(self, values, true_counts):
+        # Same make/break rule as deltas(), for every row of a (B, num_variables) block at once
+        literal_true = values[:, self.occurrence_variables] == self.occurrence_signs
+        counts = true_counts[:, self.occurrence_clauses]
+        gain = (counts == 0).astype(np.int16) - (literal_true & (counts == 1))
+        deltas = np.zeros((values.shape[0], self.num_variables), dtype=np.int32)
+        present = self.offsets[:-1] < self.offsets[1:]
+        if present.any():
+            deltas[:, present] = np.add.reduceat(gain, self.offsets[:-1][present], axis=1)
+        return deltas
+
+    def heights(self, configs):
+        return np.count_nonzero(self.batch_true_counts(configs), axis=1)
+
+    def evaluate_block(self, configs):
+        counts = self.batch_true_counts(configs)
+        return np.count_nonzero(counts, axis=1), self.batch_deltas(configs, counts)
+
+    def neighborhood(self):
+        # (best neighbor delta, neighbors at equal height, improving neighbors) in one pass
+        if self.num_variables == 0:
+            return None, 0, 0
+        deltas = self.deltas()
+        return int(deltas.max()), int(np.count_nonzero(deltas == 0)), int(np.count_nonzero(deltas > 0))
+
+    def classify(self):
+        # Height, optimality and neighbor counts of the current configuration from one delta vector
+        deltas = self.deltas()
+        equal = int(np.count_nonzero(deltas == 0))
+        improving = int(np.count_nonzero(deltas > 0))
+        return Neighborhood(self.height, equal, improving, self.num_variables - equal - improving)
+
+    def is_local_optimum(self, strictly_greater):
+        return self.classify().is_local_optimum(strictly_greater)
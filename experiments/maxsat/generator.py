@@ -0,0 +1,80 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+
+from .corpus import open_corpus, write_corpus
+from .instance import CompiledInstance
+from .rng import instance_rng
+
+# Random k-SAT instances drawn with NumPy: all m clauses of an instance at once. The k distinct
+# variables of a clause are the k smallest of n uniform random keys (np.argpartition), a uniform
+# k-subset, and its k signs come from k more uniforms in the same row: one (m, n + k) draw, row by row,
+# so instances that differ only in m share their first clauses. Instance i of a run comes from
+# instance_rng(seed, i), so it does not depend on how many instances are drawn.
+# InstanceCache keeps generated instances on disk as binary corpora (maxsat.corpus), one file per
+# (n, m, k, seed) named by a hash of those values and GENERATOR_VERSION plus the instance count. A run
+# asking for as many instances or fewer maps the file instead of generating; parallel runs that miss
+# at the same time write identical content, and the atomic rename of write_corpus keeps the file whole.
+
+# Changes whenever the drawing procedure does, so a cache never serves instances of an older one
+GENERATOR_VERSION = 1
+GENERATOR = f"vectorized-{GENERATOR_VERSION}"
+
+
+def random_literals(rng, num_variables, num_clauses, clause_width):
+    # (num_clauses, clause_width) int32 signed literals, k distinct variables per clause
+    if not 0 < clause_width <= num_variables:
+        raise ValueError(f"Clause width {clause_width} does not fit {num_variables} variables")
+    keys = rng.random((num_clauses, num_variables + clause_width))
+    variables = np.argpartition(keys[:, :num_variables], clause_width - 1, axis=1)[:, :clause_width]
+    variables = variables.astype(np.int32) + 1
+    return np.where(keys[:, num_variables:] < 0.5, -variables, variables)
+
+
+def random_instance(num_variables, num_clauses, clause_width, rng):
+    return CompiledInstance(num_variables, random_literals(rng, num_variables, num_clauses, clause_width))
+
+
+def random_instances(num_variables, num_clauses, clause_width, count, seed=None):
+    return [random_instance(num_variables, num_clauses, clause_width, instance_rng(seed, index))
+            for index in range(count)]
+
+
+def instance_key(num_variables, num_clauses, clause_width, seed):
+    text = json.dumps([GENERATOR_VERSION, num_variables, num_clauses, clause_width, seed])
+    return hashlib.sha256(text.encode()).hexdigest()[:24]
+
+
+class InstanceCache:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, count):
+        return os.path.join(self.directory, f"{key}-{count}.corpus")
+
+    def cached_counts(self, key):
+        # Instance counts of the files stored under key
+        prefix = os.path.join(self.directory, f"{key}-")
+        return sorted(int(path[len(prefix):-len(".corpus")]) for path in glob.glob(f"{prefix}*.corpus"))
+
+    def instances(self, num_variables, num_clauses, clause_width, count, seed):
+        # The first `count` instances of (n, m, k, seed), from the smallest file holding enough of them
+        if seed is None:
+            raise ValueError("Cached instances need a seed")
+        key = instance_key(num_variables, num_clauses, clause_width, seed)
+        stored = [cached for cached in self.cached_counts(key) if cached >= count]
+        if stored:
+            logging.info(f"Reusing {count} cached instances from {self.path(key, stored[0])}")
+            return open_corpus(self.path(key, stored[0]))[:count]
+        path = self.path(key, count)
+        write_corpus(path, random_instances(num_variables, num_clauses, clause_width, count, seed))
+        logging.info(f"{count} instances cached in {path}")
+        return open_corpus(path)[:count]
+
+    def __repr__(self):
+        return f"InstanceCache({self.directory!r})"
@@ -0,0 +1,139 @@
+import numpy as np
+
+
+class CompiledInstance:
+    # Clauses are stored once as signed 1-based variable indices: 3 is x3, -7 is "not x7".
+    # Shorter clauses are padded with 0, which never evaluates to True.
+    # tautologies: clauses dropped when compiling because they hold a literal and its negation; every
+    # configuration satisfies them, so its height over the source clauses is this many more.
+    __slots__ = ("num_variables", "literals", "tautologies", "_variables", "_signs")
+
+    def __init__(self, num_variables, literals, tautologies=0):
+        literals = np.asarray(literals, dtype=np.int32)
+        if literals.ndim != 2:
+            raise ValueError("literals must be a (num_clauses, clause_width) array")
+        if literals.size and np.abs(literals).max() > num_variables:
+            raise ValueError("Clause refers to a variable outside 1..num_variables")
+        self.num_variables = num_variables
+        self.literals = literals
+        self.tautologies = tautologies
+        self._variables = None
+        self._signs = None
+
+    @property
+    def num_clauses(self):
+        return self.literals.shape[0]
+
+    @property
+    def clause_width(self):
+        return self.literals.shape[1]
+
+    @property
+    def variables(self):
+        # 0-based variable index of every literal; padding points at an extra always-False slot
+        if self._variables is None:
+            variables = np.abs(self.literals).astype(np.intp) - 1
+            variables[self.literals == 0] = self.num_variables
+            self._variables = variables
+        return self._variables
+
+    @property
+    def signs(self):
+        if self._signs is None:
+            self._signs = self.literals >= 0
+        return self._signs
+
+    @property
+    def padded(self):
+        return bool((self.literals == 0).any())
+
+    def literal_values(self, values):
+        # values: (..., num_variables) bools -> (..., num_clauses, clause_width) literal truth table
+        values = np.asarray(values, dtype=bool)
+        if self.padded:
+            padding = np.zeros(values.shape[:-1] + (1,), dtype=bool)
+            values = np.concatenate([values, padding], axis=-1)
+        return values[..., self.variables] == self.signs
+
+    def satisfied_clauses(self, values):
+        return self.literal_values(values).any(axis=-1)
+
+    def count_successful_clauses(self, values):
+        return self.satisfied_clauses(values).sum(axis=-1)
+
+    def clause_strings(self):
+        clauses = []
+        for row in self.literals:
+            clause = [f"x{lit}" if lit > 0 else f"not x{-lit}" for lit in row if lit != 0]
+            clauses.append(f"({' or '.join(clause)})")
+        return clauses
+
+    def __len__(self):
+        return self.num_clauses
+
+    def __repr__(self):
+        tautologies = f", tautologies={self.tautologies}" if self.tautologies else ""
+        return (f"CompiledInstance(num_variables={self.num_variables}, "
+                f"num_clauses={self.num_clauses}, clause_width={self.clause_width}{tautologies})")
+
+
+def parse_clause(clause):
+    # "(x3 or not x7 or x1)" -> [3, -7, 1]
+    literals = []
+    for literal in clause.replace("(", "").replace(")", "").split(" or "):
+        literal = literal.strip()
+        if literal.startswith("not "):
+            literals.append(-int(literal[4:].strip()[1:]))
+        else:
+            literals.append(int(literal[1:]))
+    return literals
+
+
+def _normalize_clause(clause):
+    literals = []
+    for literal in clause:
+        literal = int(literal)
+        if literal == 0:
+            raise ValueError("Literal 0 is not a valid variable reference")
+        if literal not in literals:
+            literals.append(literal)
+    return literals
+
+
+def is_tautology(clause):
+    # True for a clause (sequence of signed ints) holding a literal and its negation
+    literals = {int(literal) for literal in clause}
+    return any(-literal in literals for literal in literals)
+
+
+def compile_instance(clauses, num_variables=None):
+    # clauses: clause strings as built by CompiledInstance.clause_strings, or sequences of signed ints.
+    # Tautological clauses are dropped and counted in CompiledInstance.tautologies.
+    rows = [_normalize_clause(parse_clause(c) if isinstance(c, str) else c) for c in clauses]
+    tautologies = sum(is_tautology(row) for row in rows)
+    if tautologies:
+        rows = [row for row in rows if not is_tautology(row)]
+    width = max((len(row) for row in rows), default=0)
+    literals = np.zeros((len(rows), width), dtype=np.int32)
+    for i, row in enumerate(rows):
+        literals[i, :len(row)] = row
+    if num_variables is None:
+        num_variables = int(np.abs(literals).max()) if literals.size else 0
+    return CompiledInstance(num_variables, literals, tautologies)
+
+
+def compile_instances(instances, num_variables=None):
+    return [compile_instance(instance, num_variables) for instance in instances]
+
+
+def to_bitmask(values):
+    # Bit i of the mask is the value of variable i + 1 (same convention as the census)
+    mask = 0
+    for var in np.flatnonzero(values):
+        mask |= 1 << int(var)
+    return mask
+
+
+def from_bitmask(mask, num_variables):
+    packed = np.frombuffer(mask.to_bytes((num_variables + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(packed, count=num_variables, bitorder="little").astype(bool)
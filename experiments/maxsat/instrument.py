@@ -0,0 +1,179 @@
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Opt-in instrumentation of the hot paths: call counters, wall and CPU time per phase, throughput
+# samples and peak RSS, written as a JSON run report, plus a live progress line on stderr.
+# Instrumentation is off until enable(); while it is off count(), phase() and progress() return at
+# once, and the per-configuration loops check active() once and skip all of it.
+# Phases may nest (classification runs inside a climb), and their times include the nested phases.
+# Work units run in worker processes are recorded there and merged into the parent's recorder.
+
+DEFAULT_SAMPLE_INTERVAL = 10.0
+PROGRESS_INTERVAL = 0.5
+
+_recorder = None
+_no_phase = nullcontext()
+
+
+def peak_rss():
+    # (this process, waited-for child processes) in bytes, None where unavailable
+    if resource is None:
+        return None, None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit)
+
+
+class Recorder:
+    def __init__(self, progress=False, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        self.show_progress = progress
+        self.sample_interval = sample_interval
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.counters = {}
+        # name -> [calls, wall seconds, CPU seconds]
+        self.phases = {}
+        # Counter snapshots every sample_interval seconds, for throughput over time
+        self.samples = []
+        self._last_sample = self.start_wall
+        self._last_progress = 0.0
+        self._progress_shown = False
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_phase(self, name, calls, wall, cpu):
+        totals = self.phases.setdefault(name, [0, 0.0, 0.0])
+        totals[0] += calls
+        totals[1] += wall
+        totals[2] += cpu
+        self._maybe_sample()
+
+    def _maybe_sample(self):
+        now = time.perf_counter()
+        if now - self._last_sample >= self.sample_interval:
+            self._last_sample = now
+            self.samples.append({"elapsed": now - self.start_wall, "counters": dict(self.counters)})
+
+    def progress(self, label, done, total):
+        now = time.perf_counter()
+        finished = done >= total
+        if not self.show_progress or (now - self._last_progress < PROGRESS_INTERVAL and not finished):
+            return
+        self._last_progress = now
+        elapsed = now - self.start_wall
+        line = f"{label}: {done}/{total} ({100 * done / max(total, 1):.1f}%), {elapsed:.0f} s"
+        configurations = self.counters.get("configurations_evaluated")
+        if configurations:
+            line += f", {configurations / max(elapsed, 1e-9):.4g} configurations/s"
+        sys.stderr.write(f"\r{line:<100}" + ("\n" if finished else ""))
+        sys.stderr.flush()
+        self._progress_shown = not finished
+        self._maybe_sample()
+
+    def end_progress(self):
+        if self._progress_shown:
+            sys.stderr.write("\n")
+            self._progress_shown = False
+
+    def snapshot(self):
+        # Counters and phases, to be merged into another recorder (from a worker process)
+        return {"counters": dict(self.counters), "phases": {name: list(totals) for name, totals in self.phases.items()}}
+
+    def merge(self, snapshot):
+        for name, amount in snapshot["counters"].items():
+            self.count(name, amount)
+        for name, (calls, wall, cpu) in snapshot["phases"].items():
+            self.add_phase(name, calls, wall, cpu)
+
+    def report(self):
+        wall = time.perf_counter() - self.start_wall
+        rss, children_rss = peak_rss()
+        return {
+            "wall_seconds": wall,
+            "cpu_seconds": time.process_time() - self.start_cpu,
+            "peak_rss_bytes": rss,
+            "children_peak_rss_bytes": children_rss,
+            "counters": self.counters,
+            "rates": {f"{name}_per_second": amount / wall for name, amount in self.counters.items() if wall > 0},
+            # Phase times of worker processes are included, so they can add up to more than wall_seconds
+            "phases": {name: {"calls": calls, "wall_seconds": phase_wall, "cpu_seconds": phase_cpu}
+                       for name, (calls, phase_wall, phase_cpu) in sorted(self.phases.items())},
+            "samples": self.samples,
+        }
+
+
+class _Phase:
+    __slots__ = ("recorder", "name", "wall", "cpu")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.add_phase(self.name, 1, time.perf_counter() - self.wall, time.process_time() - self.cpu)
+        return False
+
+
+def enable(progress=False, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+    global _recorder
+    _recorder = Recorder(progress, sample_interval)
+    return _recorder
+
+
+def disable():
+    # Stops recording and returns the recorder (None if instrumentation was off)
+    global _recorder
+    recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.end_progress()
+    return recorder
+
+
+def active():
+    return _recorder
+
+
+def count(name, amount=1):
+    if _recorder is not None:
+        _recorder.count(name, amount)
+
+
+def phase(name):
+    if _recorder is None:
+        return _no_phase
+    return _Phase(_recorder, name)
+
+
+def progress(label, done, total):
+    if _recorder is not None:
+        _recorder.progress(label, done, total)
+
+
+def collect(function, *args):
+    # Runs function(*args) in a worker process with a recorder of its own -> (result, snapshot)
+    recorder = enable()
+    try:
+        result = function(*args)
+    finally:
+        disable()
+    return result, recorder.snapshot()
+
+
+def write_report(path, recorder=None, **extra):
+    report = dict(extra, **(recorder or _recorder).report())
+    with open(path, "w") as file:
+        json.dump(report, file, indent=1)
@@ -0,0 +1,139 @@
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from . import instrument
+
+DEFAULT_RETRIES = 2
+DEFAULT_CHUNK_SIZE = 100000
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def chunk_ranges(num_configurations, chunk_size=DEFAULT_CHUNK_SIZE):
+    return [(start, min(start + chunk_size, num_configurations))
+            for start in range(0, num_configurations, chunk_size)]
+
+
+def work_units(num_instances, num_configurations, chunk_size=DEFAULT_CHUNK_SIZE):
+    # (instance index, first configuration, end) for every chunk of every instance
+    return [(index, start, stop)
+            for index in range(num_instances)
+            for start, stop in chunk_ranges(num_configurations, chunk_size)]
+
+
+def _run_serial(function, units, retries, errors):
+    for unit in units:
+        for attempt in range(retries + 1):
+            try:
+                yield function(*unit)
+                break
+            except Exception as error:
+                if attempt < retries:
+                    logging.warning(f"Work unit failed ({error!r}), retry {attempt + 1}/{retries}")
+                elif errors == "return":
+                    yield error
+                else:
+                    raise
+
+
+def iter_units(function, units, workers=1, retries=DEFAULT_RETRIES, errors="raise", max_pending=None):
+    # Calls function(*unit) for every unit and yields the results in unit order.
+    # At most max_pending units are in flight; a failed unit is resubmitted up to `retries` times,
+    # after which its exception is raised (errors="raise") or yielded in its place (errors="return").
+    # A worker that dies counts only against a unit that breaks a pool while running alone.
+    if errors not in ("raise", "return"):
+        raise ValueError(f"errors must be 'raise' or 'return', got {errors!r}")
+    units = list(units)
+    if workers <= 1 or len(units) <= 1:
+        for done, result in enumerate(_run_serial(function, units, retries, errors), 1):
+            # Before the yield: the caller may stop iterating after the last result
+            instrument.progress("Work units", done, len(units))
+            yield result
+        return
+    recorder = instrument.active()
+    if recorder is not None:
+        # Workers record into recorders of their own, merged here as their units finish
+        function = partial(instrument.collect, function)
+    if max_pending is None:
+        max_pending = 2 * workers
+
+    results = {}
+    attempts = [0] * len(units)
+    queue = list(range(len(units)))
+    queue.reverse()
+    # Units in flight when a worker died: any of them may have killed it, so none is charged for the
+    # break; each reruns alone in a pool of its own, where a break is that unit's doing
+    suspects = []
+    next_to_yield = 0
+
+    def record(index, result):
+        if recorder is not None:
+            result, snapshot = result
+            recorder.merge(snapshot)
+        results[index] = result
+
+    def fail(index, error):
+        # True when the unit is to be run again
+        attempts[index] += 1
+        if attempts[index] <= retries:
+            logging.warning(f"Work unit {index} failed ({error!r}), retry {attempts[index]}/{retries}")
+            return True
+        if errors == "return":
+            results[index] = error
+            return False
+        raise error
+
+    while next_to_yield < len(units):
+        if suspects:
+            index = suspects.pop(0)
+            while True:
+                try:
+                    with ProcessPoolExecutor(max_workers=1) as pool:
+                        record(index, pool.submit(function, *units[index]).result())
+                    break
+                except Exception as error:
+                    if not fail(index, error):
+                        break
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = {}
+                while (queue or pending) and not suspects:
+                    while queue and len(pending) < max_pending:
+                        index = queue.pop()
+                        pending[pool.submit(function, *units[index])] = index
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = pending.pop(future)
+                        try:
+                            record(index, future.result())
+                        except BrokenProcessPool as error:
+                            if not suspects:
+                                logging.warning(f"Worker process died ({error!r}), rerunning the units in "
+                                                f"flight one at a time")
+                            suspects.append(index)
+                        except Exception as error:
+                            if fail(index, error):
+                                queue.append(index)
+                    while next_to_yield in results:
+                        next_to_yield += 1
+                        instrument.progress("Work units", next_to_yield, len(units))
+                        yield results.pop(next_to_yield - 1)
+                if suspects:
+                    suspects.extend(pending.values())
+                    suspects.sort()
+                    for future in pending:
+                        future.cancel()
+                queue.sort(reverse=True)
+        while next_to_yield in results:
+            next_to_yield += 1
+            instrument.progress("Work units", next_to_yield, len(units))
+            yield results.pop(next_to_yield - 1)
+
+
+def run_units(function, units, workers=1, retries=DEFAULT_RETRIES, errors="raise"):
+    return list(iter_units(function, units, workers, retries, errors))
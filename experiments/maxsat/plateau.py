@@ -0,0 +1,153 @@
+from collections import deque
+
+import numpy as np
+
+from . import instrument
+from .instance import to_bitmask
+
+# Plateaus: the connected region of configurations at one height that can be reached from a
+# configuration by single flips that keep the height (a flip with gain 0). The region is flood-filled
+# breadth first, one block of the queue at a time: the evaluator's evaluate_block gives the flip gains
+# of every variable for the whole block at once (the make/break rule of FlipEngine), and only the
+# gain-0 flips are followed. Visited configurations are kept as bitmasks (bit i = variable i + 1) in a
+# dict from bitmask to row, and edges as adjacency lists of rows for the diameter.
+# A plateau has an exit when one of its configurations has an improving flip: a climb can leave it
+# upwards, so its configurations are local optima only as far as single flips can tell.
+# Exploration stops at max_size configurations; the result is then marked truncated and describes the
+# explored part only, the ball of configurations closest to the start.
+
+DEFAULT_MAX_SIZE = 2000
+# Configurations evaluated together
+DEFAULT_BLOCK_SIZE = 512
+# Largest plateau whose diameter is computed exactly (a breadth-first search from every configuration);
+# larger ones get a lower bound from repeated sweeps (exact on trees from the second sweep on)
+EXACT_DIAMETER_SIZE = 200
+DIAMETER_SWEEPS = 4
+
+
+class PlateauResult:
+    def __init__(self, height, size, exits, truncated, diameter, diameter_exact):
+        self.height = height
+        self.size = size
+        # exits: configurations of the plateau with an improving flip
+        self.exits = exits
+        self.truncated = truncated
+        # Longest shortest path between two configurations, in flips within the plateau
+        self.diameter = diameter
+        self.diameter_exact = diameter_exact
+
+    @property
+    def has_exit(self):
+        return self.exits > 0
+
+    def as_dict(self):
+        return {"height": self.height, "size": self.size, "exits": self.exits, "truncated": self.truncated,
+                "diameter": self.diameter, "diameter_exact": self.diameter_exact}
+
+    def __repr__(self):
+        return (f"PlateauResult(height={self.height}, size={self.size}, exits={self.exits}, "
+                f"truncated={self.truncated}, diameter={self.diameter})")
+
+
+def unpack_masks(masks, num_variables):
+    # Bitmasks -> (B, num_variables) bools
+    num_bytes = (num_variables + 7) // 8
+    packed = np.frombuffer(b"".join(mask.to_bytes(num_bytes, "little") for mask in masks), dtype=np.uint8)
+    return np.unpackbits(packed.reshape(len(masks), num_bytes), axis=1, count=num_variables,
+                         bitorder="little").astype(bool)
+
+
+def flood_plateau(engine, start, max_size=DEFAULT_MAX_SIZE, block_size=DEFAULT_BLOCK_SIZE):
+    # -> (height, bitmasks in breadth-first order, adjacency lists of rows, exits, truncated);
+    # engine: a FlipEngine or any evaluator with evaluate_block (see maxsat.batch.make_evaluator)
+    if max_size < 1:
+        raise ValueError(f"max_size must be at least 1, got {max_size}")
+    num_variables = len(start)
+    order = [to_bitmask(start)]
+    index = {order[0]: 0}
+    adjacency = [[]]
+    height = None
+    exits = 0
+    truncated = False
+    done = 0
+    while done < len(order):
+        # The next block of the queue: a breadth-first level, or part of one
+        rows = range(done, min(len(order), done + block_size))
+        done = rows.stop
+        heights, deltas = engine.evaluate_block(unpack_masks(order[rows.start:rows.stop], num_variables))
+        if height is None:
+            height = int(heights[0])
+        exits += int(np.count_nonzero((deltas > 0).any(axis=1)))
+        block_rows, variables = np.nonzero(deltas == 0)
+        for row, var in zip((block_rows + rows.start).tolist(), variables.tolist()):
+            neighbor = order[row] ^ (1 << var)
+            neighbor_row = index.get(neighbor)
+            if neighbor_row is None:
+                if len(order) >= max_size:
+                    truncated = True
+                    continue
+                neighbor_row = index[neighbor] = len(order)
+                order.append(neighbor)
+                adjacency.append([])
+            # Every edge is seen once from each end
+            adjacency[row].append(neighbor_row)
+    return height, order, adjacency, exits, truncated
+
+
+def eccentricity(adjacency, source):
+    # (farthest row from source, its distance in edges)
+    distances = [-1] * len(adjacency)
+    distances[source] = 0
+    queue = deque([source])
+    row = source
+    while queue:
+        row = queue.popleft()
+        for neighbor in adjacency[row]:
+            if distances[neighbor] < 0:
+                distances[neighbor] = distances[row] + 1
+                queue.append(neighbor)
+    # Breadth-first order: the last row dequeued is a farthest one
+    return row, distances[row]
+
+
+def plateau_diameter(adjacency):
+    # (diameter, exact): exact up to EXACT_DIAMETER_SIZE rows, beyond that a lower bound from
+    # DIAMETER_SWEEPS searches, each started at the farthest row of the one before
+    if len(adjacency) <= EXACT_DIAMETER_SIZE:
+        return max(eccentricity(adjacency, row)[1] for row in range(len(adjacency))), True
+    far, diameter = eccentricity(adjacency, 0)
+    for _ in range(DIAMETER_SWEEPS - 1):
+        far, distance = eccentricity(adjacency, far)
+        diameter = max(diameter, distance)
+    return diameter, False
+
+
+def _explore(engine, start, max_size):
+    with instrument.phase("plateau"):
+        height, members, adjacency, exits, truncated = flood_plateau(engine, start, max_size)
+        diameter, exact = plateau_diameter(adjacency)
+    instrument.count("plateaus")
+    instrument.count("plateau_configurations", len(members))
+    return PlateauResult(height, len(members), exits, truncated, diameter, exact), members
+
+
+def explore_plateau(engine, start, max_size=DEFAULT_MAX_SIZE):
+    return _explore(engine, start, max_size)[0]
+
+
+class PlateauCache:
+    # Plateaus already flood-filled, by the bitmasks of their configurations: a second optimum on a
+    # plateau that was explored completely gets the same result without another flood fill
+    def __init__(self, engine, max_size=DEFAULT_MAX_SIZE):
+        self.engine = engine
+        self.max_size = max_size
+        self.plateaus = {}
+
+    def explore(self, start):
+        result = self.plateaus.get(to_bitmask(start))
+        if result is None:
+            result, members = _explore(self.engine, start, self.max_size)
+            if not result.truncated:
+                # A truncated fill depends on where it started: only complete plateaus are shared
+                self.plateaus.update(dict.fromkeys(members, result))
+        return result
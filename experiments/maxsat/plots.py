@@ -0,0 +1,177 @@
+import logging
+
+import numpy as np
+
+# Figures of the six experiments and the random-walk analysis. matplotlib (and seaborn/pandas for
+# Exp6) are imported only when a figure is drawn, so compute-only runs never load the plotting stack.
+# Every function shows the figure, or saves it to `path` without opening a window.
+
+
+def _pyplot(path):
+    import matplotlib
+    if path is not None:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _finish(plt, path):
+    if path is None:
+        plt.show()
+    else:
+        plt.savefig(path)
+        plt.close()
+
+
+def plot_local_optima_ratio(percentages, title, path=None):
+    plt = _pyplot(path)
+    # Histogram without a fixed range=(0,1) to see the actual spread of the data
+    data, bins = np.histogram(percentages, bins=20)
+    bin_centers = (bins[:-1] + bins[1:]) / 2
+
+    plt.figure(figsize=(7, 5))
+    plt.bar(bin_centers, data / np.sum(data), width=np.diff(bins), alpha=0.75,
+            edgecolor='black', align='center')
+
+    mean_val = np.mean(percentages)
+    min_val = min(percentages)
+    max_val = max(percentages)
+
+    # Center the axis on the mean: half-width is the distance from the mean to the farthest value
+    dist = max(mean_val - min_val, max_val - mean_val)
+    if dist < 0.1:
+        dist = 0.1  # Minimum half-width
+    left = max(mean_val - dist, 0)
+    right = min(mean_val + dist, 1)
+    if left == right:  # All values are the same
+        left = 0
+        right = 0.1
+    plt.xlim(left, right)
+
+    # Center line, when the range leaves room for it
+    if right - left > 0.5:
+        center = (left + right) / 2
+        plt.axvline(center, color='blue', linestyle=':', label=f'Center ~ {center:.2f}')
+
+    plt.xlabel('Local Optimality Ratio')
+    plt.ylabel('Relative Frequency')
+    plt.title(title)
+    plt.grid(axis='both')
+    if right - left > 0.5:
+        plt.legend()
+    _finish(plt, path)
+
+
+def plot_height_distribution(height_counts, num_clauses, path=None):
+    # height_counts[h] = number of local optima of height h
+    height_counts = np.asarray(height_counts)
+    if not height_counts.any():
+        logging.warning("No local optima found, nothing to plot")
+        return
+    plt = _pyplot(path)
+
+    # Heights normalized by the number of clauses
+    present = np.flatnonzero(height_counts)
+    normalized_heights = np.arange(len(height_counts)) / num_clauses
+    min_height = normalized_heights[present[0]]
+    max_height = normalized_heights[present[-1]]
+
+    # 5% padding around the data range
+    padding = (max_height - min_height) * 0.05
+    x_min = max(0, min_height - padding)
+    x_max = min(1, max_height + padding)
+
+    num_bins = 50
+    data, bins = np.histogram(normalized_heights, bins=num_bins, range=(x_min, x_max), weights=height_counts)
+    data = data / np.sum(data)
+    bin_centers = (bins[:-1] + bins[1:]) / 2
+
+    plt.figure(figsize=(12, 7))
+    plt.bar(bin_centers, data, width=np.diff(bins), alpha=0.7,
+            edgecolor='black', align='center')
+
+    plt.xlabel('Normalized Number of Satisfied Clauses (Height)', fontsize=14)
+    plt.ylabel('Normalized Frequency of Local Optima', fontsize=14)
+    plt.title('Distribution of Local Optima by Height', fontsize=16)
+    plt.grid(axis='both')
+    _finish(plt, path)
+
+
+def plot_neighbor_percentages(neighbor_counts, num_variables, path=None):
+    # neighbor_counts[c] = number of local optima with c same-height neighbors
+    neighbor_counts = np.asarray(neighbor_counts)
+    if not neighbor_counts.any():
+        logging.warning("No local optima found, nothing to plot")
+        return
+    plt = _pyplot(path)
+    present = np.flatnonzero(neighbor_counts)
+    neighbor_percentages = present / num_variables
+    # Normalized by the total number of local optima
+    weights = neighbor_counts[present] / neighbor_counts.sum()
+
+    plt.figure(figsize=(12, 6))
+    plt.hist(neighbor_percentages, bins=20, weights=weights, alpha=0.75, edgecolor='black')
+    mean_value = float(neighbor_percentages @ weights)
+    plt.axvline(mean_value, color='red', linestyle='dashed', linewidth=1)
+    plt.text(mean_value * 1.05, plt.ylim()[1] * 0.95, 'Mean: {:.2f}'.format(mean_value), color='red')
+
+    plt.title('The distribution of local optima by ratio of same-height neighbors')
+    plt.xlabel('Normalized Percentage of Neighbors with the Same Height')
+    plt.ylabel('Normalized Number of Local Optima')
+    plt.grid(True, which='both')
+    _finish(plt, path)
+
+
+def visualize_all_metrics(all_metrics, metric_names, path=None):
+    plt = _pyplot(path)
+    plt.figure(figsize=(12, 12))
+    for i, metric_key in enumerate(metric_names.keys(), 1):
+        plt.subplot(2, 2, i)
+        plt.hist(all_metrics[metric_key], bins=20, alpha=0.75, color='royalblue', edgecolor='black')
+        plt.title(f'Distribution of {metric_names[metric_key]}')
+        plt.xlabel(metric_names[metric_key])
+        plt.ylabel('Number of Instances')
+        plt.grid(True, linestyle='--', linewidth=0.5)
+    plt.tight_layout()
+    _finish(plt, path)
+
+
+def visualize_height_distance_seaborn(distance_means_by_height, path=None):
+    plt = _pyplot(path)
+    import pandas as pd
+    import seaborn as sns
+
+    data = pd.DataFrame({
+        "Height": list(distance_means_by_height.keys()),
+        "Average Hamming Distance": list(distance_means_by_height.values())
+    })
+
+    plt.figure(figsize=(12, 8))
+    sns.barplot(x="Height", y="Average Hamming Distance", data=data, palette="Blues_d")
+    plt.title('Average Hamming Distance by Local Optima Height')
+    plt.xlabel('Height of Local Optima')
+    plt.ylabel('Average Hamming Distance')
+    plt.xticks(rotation=45)
+    plt.grid(True, which='both')
+    _finish(plt, path)
+
+
+def plot_autocorrelation(autocorrelation, correlation_length=None, path=None):
+    # autocorrelation[s] = correlation of heights s steps apart along a random walk
+    autocorrelation = np.asarray(autocorrelation, dtype=float)
+    plt = _pyplot(path)
+    lags = np.arange(len(autocorrelation))
+
+    plt.figure(figsize=(10, 6))
+    plt.plot(lags, autocorrelation, marker='.', label='Measured')
+    if correlation_length:
+        # The exponential decay r(s) = exp(-s / correlation length) of an AR(1) landscape
+        plt.plot(lags, np.exp(-lags / correlation_length), color='red', linestyle='dashed',
+                 label=f'exp(-s / {correlation_length:.2f})')
+        plt.legend()
+    plt.axhline(0, color='black', linewidth=0.5)
+    plt.xlabel('Lag (flips)')
+    plt.ylabel('Height Autocorrelation')
+    plt.title('Autocorrelation of Heights along Random Walks')
+    plt.grid(True, which='both')
+    _finish(plt, path)
@@ -0,0 +1,96 @@
+import logging
+import math
+
+from .sequential import DEFAULT_CONFIDENCE, MeanMonitor
+from .stream import IntegerHistogram
+from .sweep import grid
+from .walks import AutocorrelationEstimate
+
+# Adaptive refinement of the clause-to-variable ratio: for one n and k, a coarse m/n grid is run
+# through a Sweep and new points are placed, a few per round, in the gaps between neighboring
+# points where the metric curve is least resolved. A gap's score, in units of the metric, is the
+# larger of the change of the metric across it (the curve changes fast there) and the overlap of
+# the two confidence intervals (the change there is not yet told apart from noise). Gaps one clause
+# wide cannot be split. The curve grows to a total number of points, so a rerun continues a stopped
+# refinement instead of adding more rounds.
+
+# Coarse grid used when no ratios are given
+DEFAULT_RATIOS = (1, 2, 4, 8, 16)
+
+# Per-instance value of the metric for each experiment that can be refined
+METRICS = {
+    "exp1": "share of configurations that are local optima",
+    "exp3": "mean local optimum height / number of clauses",
+    "walks": "correlation length of random walks, in flips",
+}
+
+
+def instance_values(experiment, num_clauses, results, strictly_greater=False):
+    # Metric per instance from a point's finished job results
+    if experiment == "exp1":
+        key = "strict" if strictly_greater else "non_strict"
+        return [result[key]["estimate"] for _, result in results]
+    if experiment == "walks":
+        lengths = [AutocorrelationEstimate.from_dict(result).correlation_length for _, result in results]
+        return [length for length in lengths if math.isfinite(length)]
+    histograms = [IntegerHistogram(result["height_counts"]) for _, result in results]
+    return [histogram.mean / num_clauses for histogram in histograms if histogram.total]
+
+
+def ratio_curve(sweep, num_variables, clause_width, strictly_greater=False, confidence=DEFAULT_CONFIDENCE):
+    # The points of the sweep with this n and k, by m: metric mean over instances and its interval
+    if sweep.experiment not in METRICS:
+        raise ValueError(f"Refinement needs one of {sorted(METRICS)}, the sweep runs {sweep.experiment}")
+    curve = []
+    for point, (n, num_clauses, k) in sweep.points().items():
+        if (n, k) != (num_variables, clause_width):
+            continue
+        values = instance_values(sweep.experiment, num_clauses, sweep.finished_results(point), strictly_greater)
+        if not values:
+            continue
+        # Instances are the samples: the interval covers the spread between instances
+        monitor = MeanMonitor(confidence=confidence)
+        monitor.update(values)
+        low, high = monitor.interval()
+        curve.append({"num_clauses": num_clauses, "clause_ratio": num_clauses / num_variables,
+                      "mean": monitor.mean, "low": low if math.isfinite(low) else None,
+                      "high": high if math.isfinite(high) else None, "instances": len(values)})
+    return sorted(curve, key=lambda entry: entry["num_clauses"])
+
+
+def gap_score(left, right):
+    change = abs(right["mean"] - left["mean"])
+    if None in (left["low"], left["high"], right["low"], right["high"]):
+        # A single instance has no interval
+        return change
+    overlap = max(0.0, min(left["high"], right["high"]) - max(left["low"], right["low"]))
+    return max(change, overlap)
+
+
+def refinement_points(curve, count):
+    # Numbers of clauses to add: the midpoints of the `count` best-scoring gaps
+    gaps = [(gap_score(left, right), (left["num_clauses"] + right["num_clauses"]) // 2)
+            for left, right in zip(curve, curve[1:]) if right["num_clauses"] - left["num_clauses"] > 1]
+    gaps.sort(reverse=True)
+    return [num_clauses for _, num_clauses in gaps[:count]]
+
+
+def refine_ratio(sweep, num_variables, clause_width, ratios, max_points, points_per_round=2, workers=1,
+                 strictly_greater=False, confidence=DEFAULT_CONFIDENCE):
+    # Runs the coarse grid, then adds up to points_per_round points per round until the curve has
+    # max_points points or no gap can be split. Returns the final curve.
+    sweep.add_points(grid([num_variables], clause_widths=[clause_width], ratios=ratios))
+    sweep.run(workers)
+    curve = ratio_curve(sweep, num_variables, clause_width, strictly_greater, confidence)
+    while len(curve) < max_points:
+        new_points = refinement_points(curve, min(points_per_round, max_points - len(curve)))
+        if not new_points:
+            break
+        logging.info(f"Refining m/n at m = {', '.join(str(num_clauses) for num_clauses in new_points)} "
+                     f"({len(curve)}/{max_points} points)")
+        if not sweep.add_points((num_variables, num_clauses, clause_width) for num_clauses in new_points):
+            # Midpoints already in the sweep without results (their jobs keep failing)
+            break
+        sweep.run(workers)
+        curve = ratio_curve(sweep, num_variables, clause_width, strictly_greater, confidence)
+    return curve
@@ -0,0 +1,193 @@
+import math
+
+import numpy as np
+
+from .configuration import Configuration
+from .distances import num_words
+
+# Registry of the distinct local optima of one instance. Optima are keyed by bitmask (bit i = variable
+# i + 1); every distinct optimum gets a row in compact arrays: its packed uint64 words (the layout the
+# distance engine reads), its height and its hit count. Under hill climbing hits / total estimates the
+# optimum's basin of attraction. A repeated optimum costs one hash lookup.
+# For very large runs a Bloom filter can sit in front of the index and max_stored can bound the rows:
+# optima the filter has never seen skip the index lookup, and once the rows are full the filter alone
+# remembers optima, so the number of distinct optima stays countable in bounded memory (slightly
+# undercounted by the filter's false positives).
+
+MASK64 = 2 ** 64 - 1
+INITIAL_CAPACITY = 1024
+
+
+def _mix64(value):
+    # splitmix64 finalizer: spreads the bits of a 64-bit value
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def configuration_masks(configs):
+    # (B, n) bools -> bitmasks: a uint64 array for n <= 64, Python ints beyond
+    configs = np.asarray(configs, dtype=bool)
+    packed = np.packbits(configs, axis=1, bitorder="little")
+    if configs.shape[1] <= 64:
+        words = np.zeros((len(configs), 8), dtype=np.uint8)
+        words[:, :packed.shape[1]] = packed
+        return words.view("<u8").ravel()
+    return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        # Sized for `capacity` keys at the given false-positive rate
+        self.num_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, key):
+        # Double hashing over two mixes of the key folded to 64 bits
+        folded = 0
+        while True:
+            folded ^= key & MASK64
+            key >>= 64
+            if not key:
+                break
+        first = _mix64(folded)
+        second = _mix64(first) | 1
+        return [(first + index * second) % self.num_bits for index in range(self.num_hashes)]
+
+    def add(self, key):
+        # Adds the key; returns whether it may have been present before
+        present = True
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] >> bit & 1:
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+    def __contains__(self, key):
+        return all(self.bits[position // 8] >> (position % 8) & 1 for position in self._positions(key))
+
+
+class OptimaRegistry:
+    def __init__(self, num_variables, bloom=None, max_stored=None):
+        # bloom: a BloomFilter in front of the index; max_stored: rows kept at most (needs a bloom filter)
+        if max_stored is not None and bloom is None:
+            raise ValueError("max_stored needs a Bloom filter to remember the optima that are not stored")
+        self.num_variables = num_variables
+        self.bloom = bloom
+        self.max_stored = max_stored
+        self.index = {}
+        self.words = num_words(num_variables)
+        self._masks = np.zeros((INITIAL_CAPACITY, self.words), dtype=np.uint64)
+        self._heights = np.zeros(INITIAL_CAPACITY, dtype=np.int32)
+        self._hits = np.zeros(INITIAL_CAPACITY, dtype=np.int64)
+        # Hits of every optimum, and distinct optima past max_stored (counted but not stored)
+        self.total = 0
+        self.unstored = 0
+
+    @property
+    def stored(self):
+        return len(self.index)
+
+    @property
+    def unique(self):
+        return self.stored + self.unstored
+
+    @property
+    def duplicates(self):
+        return self.total - self.unique
+
+    @property
+    def masks(self):
+        # Packed (stored, words) uint64 rows, in order of first hit
+        return self._masks[:self.stored]
+
+    @property
+    def heights(self):
+        return self._heights[:self.stored]
+
+    @property
+    def hits(self):
+        return self._hits[:self.stored]
+
+    def _grow(self):
+        capacity = 2 * len(self._heights)
+        self._masks = np.concatenate([self._masks, np.zeros_like(self._masks)])[:capacity]
+        self._heights = np.resize(self._heights, capacity)
+        self._hits = np.resize(self._hits, capacity)
+
+    def add(self, mask, height, hits=1):
+        # Records `hits` hits of an optimum; returns True if it was not seen before
+        mask = int(mask)
+        self.total += hits
+        if self.bloom is not None and not self.bloom.add(mask):
+            return self._insert(mask, height, hits)
+        row = self.index.get(mask)
+        if row is not None:
+            self._hits[row] += hits
+            return False
+        if self.max_stored is not None and self.stored >= self.max_stored:
+            # Seen past max_stored, or a false positive of the filter: counted as a duplicate
+            return False
+        return self._insert(mask, height, hits)
+
+    def _insert(self, mask, height, hits):
+        if self.max_stored is not None and self.stored >= self.max_stored:
+            self.unstored += 1
+            return True
+        row = self.stored
+        if row == len(self._heights):
+            self._grow()
+        for word in range(self.words):
+            self._masks[row, word] = (mask >> (64 * word)) & MASK64
+        self._heights[row] = height
+        self._hits[row] = hits
+        self.index[mask] = row
+        return True
+
+    def add_many(self, masks, heights):
+        # Returns the number of optima not seen before
+        masks = masks.tolist() if isinstance(masks, np.ndarray) else masks
+        return sum(self.add(mask, height) for mask, height in zip(masks, np.asarray(heights).tolist()))
+
+    def add_configurations(self, configs, heights):
+        return self.add_many(configuration_masks(configs), heights)
+
+    def update(self, other):
+        # Merges another registry of the same instance (e.g. from another chunk of samples); optima
+        # the other one counted without storing them are added as distinct
+        for mask, row in other.index.items():
+            self.add(mask, int(other._heights[row]), int(other._hits[row]))
+        self.total += other.total - int(other.hits.sum())
+        self.unstored += other.unstored
+
+    def rows_by_height(self):
+        # {height: rows of the stored optima at that height}, by height
+        order = np.argsort(self.heights, kind="stable")
+        heights, starts = np.unique(self.heights[order], return_index=True)
+        return {int(height): rows for height, rows in zip(heights, np.split(order, starts[1:]))}
+
+    def configurations(self, rows=None):
+        # Stored optima as Configuration objects; the index keeps them in row order
+        masks = list(self.index)
+        if rows is not None:
+            masks = [masks[row] for row in rows]
+        return [Configuration(self.num_variables, mask) for mask in masks]
+
+    def basin_estimates(self):
+        # Share of all hits that ended in each stored optimum
+        return self.hits / self.total if self.total else self.hits.astype(float)
+
+    def summary(self):
+        return {"total": self.total, "unique": self.unique, "stored": self.stored,
+                "max_hits": int(self.hits.max()) if self.stored else 0}
+
+    def __len__(self):
+        return self.stored
+
+    def __contains__(self, mask):
+        return int(mask) in self.index
+
+    def __repr__(self):
+        return f"OptimaRegistry(num_variables={self.num_variables}, unique={self.unique}, total={self.total})"
@@ -0,0 +1,44 @@
+import logging
+
+import numpy as np
+
+from . import instrument
+
+# Every random stream is derived from one run seed and a spawn key, exactly as
+# SeedSequence(seed).spawn() would, so a stream depends only on what it is for
+# (which instance, which chunk) and not on which worker draws from it.
+INSTANCES = 0
+SAMPLES = 1
+
+
+def resolve_seed(seed=None):
+    # A run without a seed still gets one, and logs it so the run can be repeated
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+        logging.info(f"Random seed: {seed}")
+    return seed
+
+
+def make_rng(seed, *key):
+    return np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=key)))
+
+
+def instance_rng(seed, instance_index):
+    return make_rng(seed, INSTANCES, instance_index)
+
+
+def chunk_rng(seed, instance_index, chunk_index=0):
+    return make_rng(seed, SAMPLES, instance_index, chunk_index)
+
+
+def random_bits(rng, count, num_variables):
+    # count configurations as packed bits: (count, ceil(num_variables / 8)) uint8,
+    # bit i of a row (little-endian) is the value of variable i + 1
+    return rng.integers(0, 256, size=(count, (num_variables + 7) // 8), dtype=np.uint8)
+
+
+def random_configurations(rng, count, num_variables):
+    instrument.count("configurations_sampled", count)
+    with instrument.phase("sampling"):
+        bits = random_bits(rng, count, num_variables)
+        return np.unpackbits(bits, axis=1, count=num_variables, bitorder="little").view(bool)
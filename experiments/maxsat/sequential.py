@@ -0,0 +1,163 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+from .stream import RunningStats
+
+# Sequential estimation: samples arrive in batches, a monitor keeps a running confidence interval
+# and says when its half-width has reached the requested precision. The interval is recomputed at
+# every look, so its coverage is that of a fixed-size interval at each look, not a simultaneous
+# guarantee over all looks; min_samples keeps the first looks from stopping on too little data.
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MIN_SAMPLES = 1000
+DEFAULT_LOOK_SIZE = 10000
+INTERVALS = ("wilson", "clopper-pearson")
+
+
+def z_value(confidence):
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    if trials == 0:
+        return 0.0, 1.0
+    z = z_value(confidence)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    low = 0.0 if successes == 0 else max(0.0, center - half_width)
+    high = 1.0 if successes == trials else min(1.0, center + half_width)
+    return low, high
+
+
+def clopper_pearson_interval(successes, trials, confidence=DEFAULT_CONFIDENCE):
+    # Exact binomial interval from beta quantiles; needs scipy
+    from scipy.stats import beta
+    if trials == 0:
+        return 0.0, 1.0
+    alpha = 1 - confidence
+    low = beta.ppf(alpha / 2, successes, trials - successes + 1) if successes > 0 else 0.0
+    high = beta.ppf(1 - alpha / 2, successes + 1, trials - successes) if successes < trials else 1.0
+    return float(low), float(high)
+
+
+def proportion_interval(successes, trials, confidence=DEFAULT_CONFIDENCE, method="wilson"):
+    if method == "wilson":
+        return wilson_interval(successes, trials, confidence)
+    if method == "clopper-pearson":
+        return clopper_pearson_interval(successes, trials, confidence)
+    raise ValueError(f"Unknown interval {method!r}, expected one of {INTERVALS}")
+
+
+class SequentialEstimate:
+    def __init__(self, estimate, low, high, samples, stopped, budget=None):
+        self.estimate = estimate
+        self.low = low
+        self.high = high
+        # Configurations drawn, and why sampling ended: "precision", "budget" or "census" (exact)
+        self.samples = samples
+        self.stopped = stopped
+        self.budget = budget
+
+    @property
+    def half_width(self):
+        return (self.high - self.low) / 2
+
+    def as_dict(self):
+        # JSON-ready; an unbounded interval end becomes None
+        return {"estimate": self.estimate, "low": self.low if math.isfinite(self.low) else None,
+                "high": self.high if math.isfinite(self.high) else None, "samples": self.samples,
+                "budget": self.budget, "stopped": self.stopped}
+
+    def __repr__(self):
+        return (f"SequentialEstimate({self.estimate:.6g} [{self.low:.6g}, {self.high:.6g}], "
+                f"samples={self.samples}, stopped={self.stopped!r})")
+
+
+class _Monitor:
+    def __init__(self, precision=None, confidence=DEFAULT_CONFIDENCE, relative=False,
+                 min_samples=DEFAULT_MIN_SAMPLES):
+        # precision: target half-width of the interval, absolute or (relative=True) a fraction of
+        # the estimate; None never converges, so sampling runs to the budget
+        self.precision = precision
+        self.confidence = confidence
+        self.relative = relative
+        self.min_samples = min_samples
+        self.samples = 0
+
+    def converged(self):
+        if self.precision is None or self.samples < self.min_samples:
+            return False
+        low, high = self.interval()
+        target = self.precision * abs(self.estimate) if self.relative else self.precision
+        return (high - low) / 2 <= target
+
+    def result(self, budget=None):
+        low, high = self.interval()
+        stopped = "precision" if self.converged() else "budget"
+        return SequentialEstimate(self.estimate, low, high, self.samples, stopped, budget)
+
+
+class ProportionMonitor(_Monitor):
+    # Share of sampled configurations with a property (e.g. being a local optimum)
+    def __init__(self, precision=None, confidence=DEFAULT_CONFIDENCE, method="wilson", relative=False,
+                 min_samples=DEFAULT_MIN_SAMPLES):
+        if method not in INTERVALS:
+            raise ValueError(f"Unknown interval {method!r}, expected one of {INTERVALS}")
+        super().__init__(precision, confidence, relative, min_samples)
+        self.method = method
+        self.successes = 0
+
+    def update(self, successes, trials):
+        self.successes += int(successes)
+        self.samples += int(trials)
+
+    @property
+    def estimate(self):
+        return self.successes / self.samples if self.samples else 0.0
+
+    def interval(self):
+        return proportion_interval(self.successes, self.samples, self.confidence, self.method)
+
+
+class MeanMonitor(_Monitor):
+    # Mean of the values seen so far (e.g. local optimum heights) with a normal-approximation
+    # interval. samples counts drawn configurations, which may exceed the number of values.
+    def __init__(self, precision=None, confidence=DEFAULT_CONFIDENCE, relative=False,
+                 min_samples=DEFAULT_MIN_SAMPLES, min_values=30):
+        super().__init__(precision, confidence, relative, min_samples)
+        self.min_values = min_values
+        self.stats = RunningStats()
+
+    def update(self, values, trials=None):
+        values = np.asarray(values, dtype=float)
+        self.samples += values.size if trials is None else int(trials)
+        self.stats.update(values)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    @property
+    def mean(self):
+        return self.stats.mean
+
+    @property
+    def estimate(self):
+        return self.mean
+
+    @property
+    def variance(self):
+        return self.stats.sample_variance
+
+    def interval(self):
+        if self.count < 2:
+            return -math.inf, math.inf
+        half_width = z_value(self.confidence) * math.sqrt(self.variance / self.count)
+        return self.mean - half_width, self.mean + half_width
+
+    def converged(self):
+        return self.count >= self.min_values and super().converged()
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+
+import numpy as np
+
+from .rng import resolve_seed
+
+# On-disk results of a long run: one compressed NPZ shard per finished work unit plus a manifest.
+# manifest.json holds the run parameters (including the seed, so a resumed run draws the same
+# samples); completed.jsonl gets one line per finished unit, appended only after its shard is in
+# place. A restarted run skips every unit listed there, so a crash costs at most the units in flight.
+
+MANIFEST = "manifest.json"
+COMPLETED = "completed.jsonl"
+
+
+def unit_key(instance_index, chunk_index=0):
+    return f"{instance_index:06d}-{chunk_index:06d}"
+
+
+def _write_atomic(path, write):
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        write(file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+class ShardStore:
+    def __init__(self, directory, parameters=None):
+        # parameters: JSON-serializable run parameters. A store written with different parameters
+        # is refused; a None seed adopts the stored one (or a fresh one for a new store).
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        parameters = dict(parameters or {})
+        manifest_path = os.path.join(directory, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as file:
+                stored = json.load(file)["parameters"]
+            if parameters.get("seed", stored.get("seed")) is None:
+                parameters.pop("seed", None)
+            mismatched = {key: (stored.get(key), value) for key, value in parameters.items()
+                          if stored.get(key) != value}
+            if mismatched:
+                raise ValueError(f"Store {directory} was written with different parameters "
+                                 f"(stored, requested): {mismatched}")
+            self.parameters = stored
+            logging.info(f"Resuming from {directory}")
+        else:
+            if "seed" in parameters:
+                parameters["seed"] = resolve_seed(parameters["seed"])
+            self.parameters = parameters
+            _write_atomic(manifest_path, lambda file: file.write(
+                json.dumps({"parameters": parameters}, indent=1).encode()))
+        self.completed = self._read_completed()
+
+    @property
+    def seed(self):
+        return self.parameters.get("seed")
+
+    def _read_completed(self):
+        completed = {}
+        path = os.path.join(self.directory, COMPLETED)
+        if not os.path.exists(path):
+            return completed
+        with open(path, "rb") as file:
+            content = file.read()
+        # A line cut short by a crash is dropped, so that unit is simply run again
+        complete = content[:content.rfind(b"\n") + 1]
+        if len(complete) < len(content):
+            with open(path, "r+b") as file:
+                file.truncate(len(complete))
+        for line in complete.decode().splitlines():
+            entry = json.loads(line)
+            completed[entry["key"]] = entry
+        return completed
+
+    def shard_path(self, key):
+        return os.path.join(self.directory, f"unit-{key}.npz")
+
+    def is_done(self, key):
+        return key in self.completed
+
+    def write(self, key, **columns):
+        # Shard first, then the manifest line: a listed unit always has its shard
+        _write_atomic(self.shard_path(key), lambda file: np.savez_compressed(file, **columns))
+        entry = {"key": key, "rows": {name: int(np.asarray(value).size) for name, value in columns.items()}}
+        with open(os.path.join(self.directory, COMPLETED), "a") as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.completed[key] = entry
+
+    def read(self, key):
+        with np.load(self.shard_path(key)) as shard:
+            return {name: shard[name] for name in shard.files}
+
+    def column(self, name):
+        # Arrays of one column, shard by shard in key order; only one shard is in memory at a time
+        for key in sorted(self.completed):
+            with np.load(self.shard_path(key)) as shard:
+                yield shard[name]
+
+    def concatenate(self, name):
+        return np.concatenate(list(self.column(name)))
+
+    def __len__(self):
+        return len(self.completed)
+
+    def __repr__(self):
+        return f"ShardStore({self.directory!r}, completed={len(self)})"
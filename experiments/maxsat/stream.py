@@ -0,0 +1,172 @@
+import math
+
+import numpy as np
+
+from . import instrument
+from .batch import sample_batches
+
+# Streaming side of the experiments: sample -> evaluate -> classify runs as a chain of generators over
+# blocks of configurations (sample_batches draws and evaluates a block, local_optima_blocks picks its
+# local optima), and each block is folded into aggregators that keep constant memory in the number of
+# configurations. Aggregators merge: a work unit returns its partial aggregates, which the parent
+# combines in a few array additions instead of receiving every sample.
+# The values the experiments summarize are integers in a known range (heights 0..m, same-height
+# neighbors 0..n), so an exact histogram gives the mean, the deviations and the exact median in O(range)
+# memory; a quantile sketch would only add error. RunningStats is the Welford/Chan mean and variance
+# for values without such a range.
+
+
+class RunningStats:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        # Sum of squared deviations from the mean
+        self.m2 = 0.0
+
+    def update(self, values):
+        # Chan et al. merge of the batch's count, mean and sum of squared deviations
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            batch_mean = float(values.mean())
+            self._combine(values.size, batch_mean, float(((values - batch_mean) ** 2).sum()))
+        return self
+
+    def merge(self, other):
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self):
+        # Population variance, as np.var
+        return self.m2 / self.count if self.count else math.nan
+
+    @property
+    def sample_variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else math.inf
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def __repr__(self):
+        return f"RunningStats(count={self.count}, mean={self.mean:.6g}, std={self.std:.6g})"
+
+
+class IntegerHistogram:
+    # counts[v] = number of values equal to v, for non-negative integers; grows to the largest value seen
+    def __init__(self, counts=None):
+        self.counts = np.zeros(0, dtype=np.int64) if counts is None else np.array(counts, dtype=np.int64)
+
+    @classmethod
+    def of(cls, values, size=0):
+        return cls().update(values, size)
+
+    @classmethod
+    def merged(cls, histograms):
+        result = cls()
+        for histogram in histograms:
+            result.merge(histogram)
+        return result
+
+    def _fit(self, size):
+        if size > len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros(size - len(self.counts), dtype=np.int64)])
+
+    def update(self, values, size=0):
+        # size: minimum length of counts, e.g. num_clauses + 1 so that histograms line up
+        values = np.asarray(values, dtype=np.int64).ravel()
+        self._fit(size)
+        if values.size:
+            self.add_counts(np.bincount(values))
+        return self
+
+    def add_counts(self, counts):
+        counts = np.asarray(counts, dtype=np.int64)
+        self._fit(len(counts))
+        self.counts[:len(counts)] += counts
+        return self
+
+    def merge(self, other):
+        return self.add_counts(other.counts)
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    @property
+    def values(self):
+        return np.arange(len(self.counts))
+
+    @property
+    def mean(self):
+        total = self.total
+        return float(self.counts @ self.values / total) if total else math.nan
+
+    @property
+    def variance(self):
+        # Population variance, as np.var
+        total = self.total
+        if not total:
+            return math.nan
+        return float(self.counts @ (self.values - self.mean) ** 2 / total)
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def _weighted_median(self, values, counts):
+        # Median of values repeated counts times, averaging the two middle ones as np.median does
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(counts[order])
+        total = int(cumulative[-1])
+        low = values[order[np.searchsorted(cumulative, (total - 1) // 2, side="right")]]
+        high = values[order[np.searchsorted(cumulative, total // 2, side="right")]]
+        return float((low + high) / 2)
+
+    def quantile(self, q):
+        # Smallest value with at least a q share of the values at or below it
+        if not self.total:
+            return math.nan
+        cumulative = np.cumsum(self.counts)
+        return int(np.searchsorted(cumulative, q * cumulative[-1], side="left"))
+
+    @property
+    def median(self):
+        return self._weighted_median(self.values, self.counts) if self.total else math.nan
+
+    def mean_absolute_deviation(self):
+        total = self.total
+        return float(self.counts @ np.abs(self.values - self.mean) / total) if total else math.nan
+
+    def median_absolute_deviation(self):
+        # As scipy.stats.median_abs_deviation with scale=1
+        if not self.total:
+            return math.nan
+        return self._weighted_median(np.abs(self.values - self.median), self.counts)
+
+    def metrics(self):
+        # The summary of Exp3: "mad" is the mean absolute deviation from the mean
+        return {"mean": self.mean, "std_dev": self.std, "median": self.median, "mad": self.mean_absolute_deviation()}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __repr__(self):
+        return f"IntegerHistogram(total={self.total}, mean={self.mean:.6g})"
+
+
+def local_optima_blocks(instance, num_configurations, strictly_greater=False, rng=None, backend="numpy",
+                        batch_size=None):
+    # sample -> evaluate -> classify: (configurations, BatchResult, local optimum mask) per block
+    for configs, result in sample_batches(instance, num_configurations, rng, backend=backend, batch_size=batch_size):
+        optima = result.local_optima(strictly_greater)
+        instrument.count("local_optima", int(np.count_nonzero(optima)))
+        yield configs, result, optima
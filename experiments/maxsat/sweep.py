@@ -0,0 +1,383 @@
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+import numpy as np
+
+from . import experiments
+from .census import census_feasible
+from .distances import DistanceStats
+from .generator import GENERATOR, random_instance
+from .parallel import DEFAULT_CHUNK_SIZE, DEFAULT_RETRIES, chunk_ranges
+from .rng import chunk_rng, instance_rng, resolve_seed
+from .sequential import DEFAULT_CONFIDENCE
+from .stream import IntegerHistogram
+from .walks import DEFAULT_MAX_LAG, DEFAULT_STEPS, AutocorrelationEstimate, random_walk_autocorrelation, walk_summary
+
+# Parameter sweeps: one experiment over a list of (n, m, k) points, expanded into (point, instance,
+# chunk) jobs kept in an SQLite queue next to their results. Every point uses the run seed, so its
+# jobs draw exactly the instances and samples of `python -m maxsat <experiment> -n n -m m -k k --seed s`
+# (points that differ only in m share the first clauses of every instance). A job's result is written
+# as soon as it finishes; rerunning the sweep runs only the jobs that are not done, and points can be
+# added to an existing sweep. The longest jobs start first: a job's cost is its configurations x n x m
+# x k, converted to seconds with the throughput measured on the finished jobs of its point (or of the
+# whole sweep until one of the point's jobs has finished).
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS points (
+    id INTEGER PRIMARY KEY,
+    num_variables INTEGER NOT NULL,
+    num_clauses INTEGER NOT NULL,
+    clause_width INTEGER NOT NULL,
+    UNIQUE (num_variables, num_clauses, clause_width)
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    point INTEGER NOT NULL REFERENCES points (id),
+    instance INTEGER NOT NULL,
+    chunk INTEGER NOT NULL,
+    configurations INTEGER NOT NULL,
+    work REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    seconds REAL,
+    result TEXT,
+    UNIQUE (point, instance, chunk)
+);
+"""
+
+# Options that change an experiment's results, with the CLI defaults
+OPTIONS = {
+    "exp1": {"precision": None, "confidence": DEFAULT_CONFIDENCE, "relative": False, "interval": "wilson"},
+    "exp2": {"strictly_greater": False, "backend": "bitslice", "chunk_size": DEFAULT_CHUNK_SIZE, "precision": None,
+             "confidence": DEFAULT_CONFIDENCE, "relative": False},
+    "exp3": {"precision": None, "confidence": DEFAULT_CONFIDENCE, "relative": False},
+    "exp4": {"chunk_size": 2500},
+    "exp5": {"sampling": "steepest", "required_count": 100, "plateau_size": None},
+    "exp6": {"sampling": "steepest", "required_count": 100},
+    "walks": {"steps": DEFAULT_STEPS, "max_lag": DEFAULT_MAX_LAG},
+}
+
+
+def grid(num_variables, num_clauses=None, clause_widths=(3,), ratios=None):
+    # Every combination of n, k and either m or a clause-to-variable ratio m/n (rounded to whole clauses)
+    points = []
+    for n in num_variables:
+        clause_counts = num_clauses if ratios is None else [max(1, round(ratio * n)) for ratio in ratios]
+        points.extend((n, m, k) for m in clause_counts for k in clause_widths)
+    return points
+
+
+def job_chunks(experiment, num_variables, num_configurations, options):
+    # [(chunk index, configurations)] of one instance, split the way the experiment splits it
+    chunk_size = options.get("chunk_size")
+    if experiment == "exp2" and (census_feasible(num_variables, num_configurations)
+                                 or options["precision"] is not None):
+        chunk_size = None
+    if chunk_size is None:
+        return [(0, num_configurations)]
+    return [(start // chunk_size, stop - start) for start, stop in chunk_ranges(num_configurations, chunk_size)]
+
+
+def job_work(experiment, num_variables, num_clauses, clause_width, configurations):
+    # Rough cost: every configuration is compared with its n neighbors over m clauses of k literals
+    if experiment in ("exp1", "exp2") and census_feasible(num_variables, configurations):
+        configurations = 2 ** num_variables
+    return float(configurations) * num_variables * num_clauses * clause_width
+
+
+@lru_cache(maxsize=16)
+def sweep_instance(num_variables, num_clauses, clause_width, seed, index):
+    # Instance `index` of generate_instances(n, m, k, ..., seed); cached, since its chunks are separate jobs
+    return random_instance(num_variables, num_clauses, clause_width, instance_rng(seed, index))
+
+
+def run_job(experiment, point, index, chunk, configurations, seed, options):
+    # -> (JSON-ready result, seconds)
+    start = time.perf_counter()
+    instance = sweep_instance(*point, seed, index)
+    rng = chunk_rng(seed, index, chunk)
+    if experiment == "exp1":
+        ratios = experiments.estimate_local_optima_ratios(
+            instance, configurations, chunk_rng(seed, index), options["precision"], options["confidence"],
+            options["interval"], options["relative"])
+        result = {key: estimate.as_dict() for key, estimate in ratios.items()}
+    elif experiment == "exp2":
+        height_counts = experiments.calculate_local_optima_distribution(
+            instance, configurations, options["strictly_greater"], options["backend"], rng, options["precision"],
+            options["confidence"], options["relative"])
+        result = {"height_counts": height_counts.tolist()}
+    elif experiment == "exp3" and options["precision"] is None:
+        heights = experiments.instance_height_histogram(instance, configurations, rng)
+        result = {"height_counts": heights.counts.tolist()}
+    elif experiment == "exp3":
+        heights, estimate = experiments.sample_optimum_heights(
+            instance, configurations, False, rng, precision=options["precision"], confidence=options["confidence"],
+            relative=options["relative"])
+        result = {"height_counts": heights.counts.tolist(), "estimate": estimate.as_dict()}
+    elif experiment == "exp4":
+        heights, equal_neighbors = experiments.local_optima_neighbor_counts(instance, configurations, rng)
+        result = {"height_counts": heights.counts.tolist(), "equal_neighbor_counts": equal_neighbors.counts.tolist()}
+    elif experiment == "exp5":
+        try:
+            result = {"metrics": experiments.calculate_metrics_for_instance(
+                instance, configurations, options["sampling"], rng, options["required_count"],
+                options["plateau_size"])}
+        except ValueError as error:
+            # Too few optima is a property of the instance: recorded, not retried
+            result = {"error": str(error)}
+    elif experiment == "exp6":
+        means, summary, table = experiments.instance_optima_distances(instance, configurations, options["sampling"],
+                                                                      rng, options["required_count"])
+        result = {"distance_means": {str(height): float(mean) for height, mean in means.items()},
+                  "distance_stats": experiments.distance_table_rows(table), "optima": summary}
+    else:
+        estimate = random_walk_autocorrelation(instance, configurations, options["steps"], options["max_lag"], rng)
+        result = estimate.as_dict()
+    return result, time.perf_counter() - start
+
+
+def summarize(experiment, num_variables, num_clauses, results):
+    # Results of one point's jobs, in (instance, chunk) order -> the fields of the experiment's CLI JSON
+    if experiment == "exp1":
+        summary = {}
+        for key in ("strict", "non_strict"):
+            summary[key] = [result[key]["estimate"] for result in results]
+            summary[f"{key}_estimates"] = [result[key] for result in results]
+        return summary
+    if experiment == "exp2":
+        height_counts = np.zeros(num_clauses + 1, dtype=np.int64)
+        for result in results:
+            height_counts += result["height_counts"]
+        return {"total_local_optima": int(height_counts.sum()), "height_counts": height_counts.tolist()}
+    if experiment in ("exp3", "exp4"):
+        heights = IntegerHistogram.merged(IntegerHistogram(result["height_counts"]) for result in results)
+    if experiment == "exp3":
+        metrics = heights.metrics() if heights.total else {}
+        return dict(metrics, total_local_optima=heights.total,
+                    estimates=[result["estimate"] for result in results if "estimate" in result])
+    if experiment == "exp4":
+        equal_neighbors = IntegerHistogram.merged(IntegerHistogram(result["equal_neighbor_counts"])
+                                                  for result in results)
+        return {"total_local_optima": heights.total, "height_counts": heights.counts.tolist(),
+                "equal_neighbor_counts": equal_neighbors.counts.tolist()}
+    if experiment == "exp5":
+        keys = (*experiments.METRIC_NAMES, *experiments.OPTIMA_COUNTS, *experiments.PLATEAU_METRICS)
+        metrics = [result["metrics"] for result in results if "metrics" in result]
+        return {"metrics": {key: [values.get(key) for values in metrics] for key in keys
+                            if any(key in values for values in metrics)},
+                "errors": [result["error"] for result in results if "error" in result]}
+    if experiment == "walks":
+        estimates = [AutocorrelationEstimate.from_dict(result) for result in results]
+        return walk_summary(estimates, estimates[0].max_lag if estimates else DEFAULT_MAX_LAG)
+    distance_means = {}
+    table = {}
+    for result in results:
+        distance_means.update(result["distance_means"])
+        # Sweeps stored before the per-pair statistics were added have none
+        for row in result.get("distance_stats", []):
+            key, stats = tuple(row["heights"]), DistanceStats.from_dict(row)
+            table[key] = table[key].update(stats) if key in table else stats
+    return {"distance_means": {height: distance_means[height] for height in sorted(distance_means, key=int)},
+            "distance_stats": experiments.distance_table_rows(table),
+            "optima": [result.get("optima") for result in results]}
+
+
+class Job:
+    __slots__ = ("id", "point", "instance", "chunk", "configurations", "work", "attempts")
+
+    def __init__(self, id, point, instance, chunk, configurations, work):
+        self.id = id
+        self.point = point
+        self.instance = instance
+        self.chunk = chunk
+        self.configurations = configurations
+        self.work = work
+        self.attempts = 0
+
+
+class Sweep:
+    def __init__(self, path, experiment, num_instances=None, num_configurations=None, seed=None, options=None):
+        # A new sweep needs num_instances and num_configurations (options default to OPTIONS). An existing
+        # one is refused if any given parameter differs from the stored one; None adopts the stored value.
+        if experiment not in OPTIONS:
+            raise ValueError(f"Unknown experiment {experiment!r}, expected one of {sorted(OPTIONS)}")
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        requested = {"experiment": experiment, "num_instances": num_instances,
+                     "num_configurations": num_configurations, "seed": seed, "generator": GENERATOR}
+        options = {key: value for key, value in (options or {}).items()
+                   if key in OPTIONS[experiment] and value is not None}
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'parameters'").fetchone()
+        if row is not None:
+            stored = json.loads(row[0])
+            # Options added since the sweep was created take their defaults
+            stored["options"] = dict(OPTIONS[experiment], **stored["options"])
+            mismatched = {key: (stored[key], value) for key, value in requested.items()
+                          if value is not None and stored[key] != value}
+            mismatched.update({key: (stored["options"][key], value) for key, value in options.items()
+                               if stored["options"][key] != value})
+            if mismatched:
+                raise ValueError(f"Sweep {path} was created with different parameters (stored, requested): "
+                                 f"{mismatched}")
+            self.parameters = stored
+            logging.info(f"Resuming sweep {path}")
+        else:
+            if num_instances is None or num_configurations is None:
+                raise ValueError("A new sweep needs num_instances and num_configurations")
+            requested["seed"] = resolve_seed(seed)
+            requested["options"] = dict(OPTIONS[experiment], **options)
+            self.parameters = requested
+            with self.connection:
+                self.connection.execute("INSERT INTO meta (key, value) VALUES ('parameters', ?)",
+                                        (json.dumps(requested),))
+
+    @property
+    def experiment(self):
+        return self.parameters["experiment"]
+
+    @property
+    def seed(self):
+        return self.parameters["seed"]
+
+    @property
+    def options(self):
+        return self.parameters["options"]
+
+    def add_points(self, points):
+        # Adds the jobs of every (n, m, k) point not yet in the sweep; returns the number of new points
+        num_instances = self.parameters["num_instances"]
+        num_configurations = self.parameters["num_configurations"]
+        added = 0
+        with self.connection:
+            for num_variables, num_clauses, clause_width in points:
+                if not 0 < clause_width <= num_variables:
+                    raise ValueError(f"Clause width {clause_width} does not fit {num_variables} variables")
+                cursor = self.connection.execute(
+                    "INSERT OR IGNORE INTO points (num_variables, num_clauses, clause_width) VALUES (?, ?, ?)",
+                    (num_variables, num_clauses, clause_width))
+                if cursor.rowcount == 0:
+                    continue
+                point = cursor.lastrowid
+                chunks = job_chunks(self.experiment, num_variables, num_configurations, self.options)
+                self.connection.executemany(
+                    "INSERT INTO jobs (point, instance, chunk, configurations, work) VALUES (?, ?, ?, ?, ?)",
+                    [(point, index, chunk, configurations,
+                      job_work(self.experiment, num_variables, num_clauses, clause_width, configurations))
+                     for index in range(num_instances) for chunk, configurations in chunks])
+                added += 1
+        return added
+
+    def points(self):
+        # {point id: (n, m, k)}
+        rows = self.connection.execute("SELECT id, num_variables, num_clauses, clause_width FROM points "
+                                       "ORDER BY num_variables, num_clauses, clause_width")
+        return {point: (num_variables, num_clauses, clause_width)
+                for point, num_variables, num_clauses, clause_width in rows}
+
+    def progress(self):
+        # {status: number of jobs}
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"))
+
+    def run(self, workers=1, retries=DEFAULT_RETRIES):
+        # Runs every job that is not done, longest estimated first. A failed job is resubmitted up to
+        # `retries` times and then marked failed; the next run tries it again.
+        points = self.points()
+        pending = [Job(*row) for row in self.connection.execute(
+            "SELECT id, point, instance, chunk, configurations, work FROM jobs WHERE status != 'done'")]
+        # Seconds and work of the finished jobs, per point
+        measured = {point: [seconds, work] for point, seconds, work in self.connection.execute(
+            "SELECT point, SUM(seconds), SUM(work) FROM jobs WHERE status = 'done' GROUP BY point")}
+        overall = [sum(values[0] for values in measured.values()), sum(values[1] for values in measured.values())]
+        total = len(pending)
+        logging.info(f"{total} jobs to run over {len(points)} points")
+
+        def estimate(job):
+            seconds, work = measured.get(job.point, overall)
+            return job.work * (seconds / work if work else 1.0)
+
+        def finish(job, outcome):
+            if isinstance(outcome, Exception):
+                job.attempts += 1
+                if job.attempts <= retries:
+                    logging.warning(f"Job {job.id} failed ({outcome!r}), retry {job.attempts}/{retries}")
+                    pending.append(job)
+                    return
+                logging.warning(f"Job {job.id} failed ({outcome!r}), giving up until the next run")
+                status, seconds, result = "failed", None, {"error": repr(outcome)}
+            else:
+                status, (result, seconds) = "done", outcome
+                for values in (measured.setdefault(job.point, [0.0, 0.0]), overall):
+                    values[0] += seconds
+                    values[1] += job.work
+            with self.connection:
+                self.connection.execute("UPDATE jobs SET status = ?, seconds = ?, result = ? WHERE id = ?",
+                                        (status, seconds, json.dumps(result), job.id))
+            if status == "done":
+                num_variables, num_clauses, clause_width = points[job.point]
+                remaining = sum(estimate(other) for other in pending) / max(workers, 1)
+                logging.info(f"Job {total - len(pending)}/{total} done (n={num_variables}, m={num_clauses}, "
+                             f"k={clause_width}, instance {job.instance + 1}, chunk {job.chunk}) in "
+                             f"{seconds:.2f} s; about {remaining:.0f} s left")
+
+        def arguments(job):
+            return (self.experiment, points[job.point], job.instance, job.chunk, job.configurations, self.seed,
+                    self.options)
+
+        if workers <= 1:
+            while pending:
+                # Estimates change with every finished job, so the queue is reordered before each pick
+                pending.sort(key=lambda job: (estimate(job), -job.id))
+                job = pending.pop()
+                try:
+                    outcome = run_job(*arguments(job))
+                except Exception as error:
+                    outcome = error
+                finish(job, outcome)
+            return
+        # Only as many jobs as workers are in flight, so the order above holds; a dead worker breaks
+        # the pool and ends the run, and finished jobs are already in the database
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = {}
+            while pending or running:
+                pending.sort(key=lambda job: (estimate(job), -job.id))
+                while pending and len(running) < workers:
+                    job = pending.pop()
+                    running[pool.submit(run_job, *arguments(job))] = job
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    error = future.exception()
+                    finish(job, future.result() if error is None else error)
+
+    def results(self):
+        # One entry per point: its parameters, the finished and total jobs, and the experiment's results
+        # over the finished jobs (complete once finished_jobs == jobs)
+        summaries = []
+        for point, (num_variables, num_clauses, clause_width) in self.points().items():
+            rows = self.connection.execute("SELECT status, result, seconds FROM jobs WHERE point = ? "
+                                           "ORDER BY instance, chunk", (point,)).fetchall()
+            finished = [(json.loads(result), seconds) for status, result, seconds in rows if status == "done"]
+            summaries.append(dict(
+                num_variables=num_variables, num_clauses=num_clauses, num_vars_in_clause=clause_width,
+                clause_ratio=num_clauses / num_variables, jobs=len(rows), finished_jobs=len(finished),
+                seconds=sum(seconds for _, seconds in finished),
+                **summarize(self.experiment, num_variables, num_clauses, [result for result, _ in finished]),
+            ))
+        return summaries
+
+    def finished_results(self, point):
+        # [(instance index, result)] of the point's finished jobs, in (instance, chunk) order
+        rows = self.connection.execute("SELECT instance, result FROM jobs WHERE point = ? AND status = 'done' "
+                                       "ORDER BY instance, chunk", (point,))
+        return [(instance, json.loads(result)) for instance, result in rows]
+
+    def close(self):
+        self.connection.close()
+
+    def __repr__(self):
+        return f"Sweep({self.path!r}, experiment={self.experiment!r}, points={len(self.points())})"
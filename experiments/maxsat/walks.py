@@ -0,0 +1,201 @@
+import math
+
+import numpy as np
+
+from . import instrument
+from .batch import DEFAULT_MEMORY_BUDGET
+from .flips import FlipEngine
+from .rng import random_configurations
+
+# Random-walk autocorrelation of the height landscape. A walk starts at a uniform random configuration
+# and flips one uniformly chosen variable per step, i.e. moves to a uniform member of
+# Configuration.neighbors(). Many walks of one instance run side by side: each keeps its true-literal
+# count per clause, and a step updates only the clauses of the flipped variable (padded occurrence
+# lists, so one step of every walk is a few array operations). The height series h_0..h_L of a walk is
+# centered on the exact mean height of a uniform configuration, sum over clauses of 1 - 2^-width: the
+# walk starts from the uniform distribution and never leaves it, so every step has that mean.
+# Autocovariances up to max_lag come from one FFT per walk block (the series zero-padded to avoid
+# wrap-around); they are kept as sums of products and pair counts, so estimates from separate blocks
+# or jobs merge exactly. The autocorrelation is r(s) = cov(s) / cov(0) and the correlation length
+# -1 / ln r(1) (Weinberger), the number of steps over which heights decorrelate by 1/e: the smaller it
+# is, the more rugged the landscape.
+
+DEFAULT_STEPS = 1000
+DEFAULT_MAX_LAG = 100
+# Steps whose flipped variables are drawn together
+STEP_BLOCK = 1024
+
+
+def expected_height(instance):
+    widths = np.count_nonzero(instance.literals, axis=1)
+    return float(np.sum(1 - 0.5 ** widths))
+
+
+class RandomWalks:
+    def __init__(self, instance, configs):
+        # configs: (W, n) starting configurations, one per walk
+        engine = FlipEngine(instance)
+        self.num_variables = instance.num_variables
+        self.num_clauses = instance.num_clauses
+        # occurrence_clauses[v]: clauses of variable v, padded with an extra clause column num_clauses
+        lengths = np.diff(engine.offsets)
+        self.occurrence_valid = np.arange(max(int(lengths.max(initial=0)), 1)) < lengths[:, None]
+        self.occurrence_clauses = np.full(self.occurrence_valid.shape, self.num_clauses, dtype=np.intp)
+        self.occurrence_clauses[self.occurrence_valid] = engine.occurrence_clauses
+        self.occurrence_signs = np.zeros(self.occurrence_valid.shape, dtype=bool)
+        self.occurrence_signs[self.occurrence_valid] = engine.occurrence_signs
+        self.values = np.array(configs, dtype=bool)
+        self.rows = np.arange(len(self.values))
+        counts = engine.batch_true_counts(self.values)
+        self.true_counts = np.concatenate([counts, np.ones((len(counts), 1), dtype=counts.dtype)], axis=1)
+        self.heights = np.count_nonzero(counts, axis=1)
+
+    def step(self, variables):
+        # Flips variables[w] in walk w; returns the new heights
+        clauses = self.occurrence_clauses[variables]
+        literal_true = self.occurrence_signs[variables] == self.values[self.rows, variables][:, None]
+        before = self.true_counts[self.rows[:, None], clauses]
+        after = before + np.where(literal_true, -1, 1) * self.occurrence_valid[variables]
+        self.true_counts[self.rows[:, None], clauses] = after
+        self.values[self.rows, variables] ^= True
+        self.heights += np.count_nonzero(after, axis=1) - np.count_nonzero(before, axis=1)
+        return self.heights
+
+    def walk(self, steps, rng):
+        # (W, steps + 1) heights: the start and every step
+        series = np.zeros((len(self.values), steps + 1), dtype=np.int32)
+        series[:, 0] = self.heights
+        for start in range(0, steps, STEP_BLOCK):
+            block = rng.integers(0, self.num_variables, size=(min(STEP_BLOCK, steps - start), len(self.values)))
+            for offset, variables in enumerate(block, start + 1):
+                series[:, offset] = self.step(variables)
+        return series
+
+
+class AutocorrelationEstimate:
+    def __init__(self, max_lag=DEFAULT_MAX_LAG, mean=0.0):
+        # mean: the height the series are centered on
+        self.max_lag = max_lag
+        self.mean = mean
+        # Sums over walks and start steps of (h_t - mean)(h_t+s - mean), and the number of such pairs
+        self.products = np.zeros(max_lag + 1)
+        self.pairs = np.zeros(max_lag + 1, dtype=np.int64)
+        self.walks = 0
+        self.height_sum = 0.0
+
+    def update(self, series):
+        # series: (W, L + 1) heights of W walks
+        series = np.asarray(series, dtype=float)
+        walks, length = series.shape
+        lags = min(self.max_lag + 1, length)
+        centered = series - self.mean
+        size = 1 << (length + lags - 1).bit_length()
+        spectrum = np.fft.rfft(centered, size, axis=1)
+        products = np.fft.irfft(spectrum * spectrum.conj(), size, axis=1)[:, :lags]
+        self.products[:lags] += products.sum(axis=0)
+        self.pairs[:lags] += walks * (length - np.arange(lags))
+        self.walks += walks
+        self.height_sum += float(series.sum())
+        return self
+
+    def merge(self, other):
+        # Products stay centered on each instance's own mean, so estimates of different instances merge
+        # into their pooled within-instance covariance; mean becomes the walk-weighted mean of the centers
+        if other.max_lag != self.max_lag:
+            raise ValueError(f"Only estimates with the same max_lag merge, got {self.max_lag} and {other.max_lag}")
+        if other.walks:
+            self.mean += (other.mean - self.mean) * other.walks / (self.walks + other.walks)
+        self.products += other.products
+        self.pairs += other.pairs
+        self.walks += other.walks
+        self.height_sum += other.height_sum
+        return self
+
+    @classmethod
+    def merged(cls, estimates, max_lag=DEFAULT_MAX_LAG):
+        result = cls(max_lag)
+        for estimate in estimates:
+            result.merge(estimate)
+        return result
+
+    @property
+    def covariance(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.products / self.pairs
+
+    @property
+    def autocorrelation(self):
+        covariance = self.covariance
+        return covariance / covariance[0] if self.pairs[0] and covariance[0] > 0 else np.full_like(covariance, math.nan)
+
+    @property
+    def correlation_length(self):
+        if self.max_lag < 1 or not self.pairs[1]:
+            return math.nan
+        first = float(self.autocorrelation[1])
+        return -1 / math.log(first) if 0 < first < 1 else math.nan
+
+    @property
+    def mean_height(self):
+        return self.height_sum / self.pairs[0] if self.pairs[0] else math.nan
+
+    def as_dict(self):
+        return {"max_lag": self.max_lag, "mean": self.mean, "products": self.products.tolist(),
+                "pairs": self.pairs.tolist(), "walks": self.walks, "height_sum": self.height_sum}
+
+    @classmethod
+    def from_dict(cls, data):
+        estimate = cls(data["max_lag"], data["mean"])
+        estimate.products = np.array(data["products"], dtype=float)
+        estimate.pairs = np.array(data["pairs"], dtype=np.int64)
+        estimate.walks = data["walks"]
+        estimate.height_sum = data["height_sum"]
+        return estimate
+
+    def __repr__(self):
+        return f"AutocorrelationEstimate(walks={self.walks}, correlation_length={self.correlation_length:.4g})"
+
+
+def walks_per_block(instance, steps, memory_budget=DEFAULT_MEMORY_BUDGET):
+    # Peak bytes per walk: the height series, its float copy and the FFT buffers (twice as long,
+    # complex), plus the walk's clause counts and values
+    row_bytes = 4 * (steps + 1) + 8 * (steps + 1) + 40 * (steps + 1) + 2 * instance.num_clauses
+    return max(1, memory_budget // (row_bytes + instance.num_variables))
+
+
+def random_walk_autocorrelation(instance, num_walks, steps=DEFAULT_STEPS, max_lag=DEFAULT_MAX_LAG, rng=None,
+                                memory_budget=DEFAULT_MEMORY_BUDGET):
+    # AutocorrelationEstimate of num_walks walks of `steps` flips, run a memory-bounded block at a time
+    if max_lag > steps:
+        raise ValueError(f"max_lag {max_lag} is longer than the walks ({steps} steps)")
+    if rng is None:
+        rng = np.random.default_rng()
+    estimate = AutocorrelationEstimate(max_lag, expected_height(instance))
+    block_size = walks_per_block(instance, steps, memory_budget)
+    for start in range(0, num_walks, block_size):
+        count = min(block_size, num_walks - start)
+        configs = random_configurations(rng, count, instance.num_variables)
+        with instrument.phase("walks"):
+            series = RandomWalks(instance, configs).walk(steps, rng)
+        instrument.count("walk_steps", count * steps)
+        with instrument.phase("autocorrelation"):
+            estimate.update(series)
+    return estimate
+
+
+def _finite(value):
+    # JSON has no NaN: undefined estimates (too few steps, a flat landscape) become None
+    return value if math.isfinite(value) else None
+
+
+def walk_summary(estimates, max_lag=DEFAULT_MAX_LAG):
+    # JSON-ready results of per-instance estimates: each instance's correlation length, their mean, and
+    # the autocorrelation and correlation length of all walks pooled
+    pooled = AutocorrelationEstimate.merged(estimates, max_lag)
+    lengths = [estimate.correlation_length for estimate in estimates]
+    defined = [length for length in lengths if math.isfinite(length)]
+    return {"correlation_lengths": [_finite(length) for length in lengths],
+            "mean_correlation_length": sum(defined) / len(defined) if defined else None,
+            "correlation_length": _finite(pooled.correlation_length),
+            "autocorrelation": [_finite(value) for value in pooled.autocorrelation.tolist()],
+            "mean_height": _finite(pooled.mean_height), "walks": pooled.walks}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The maxsat package is imported from experiments/, as the scripts and `python -m maxsat` do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from maxsat.batch import evaluate_batch, evaluate_blocks
+from maxsat.bitslice import sliced_sum
+from maxsat.generator import random_instance
+from maxsat.rng import instance_rng, random_configurations
+
+
+@pytest.mark.parametrize("num_variables, num_clauses, count", [(10, 50, 1), (20, 90, 200), (70, 300, 333)])
+def test_bitslice_matches_numpy(num_variables, num_clauses, count):
+    # Counts that are not a multiple of 64 leave a partly filled last word; n > 64 spans several words
+    instance = random_instance(num_variables, num_clauses, 3, instance_rng(7, 0))
+    configs = random_configurations(np.random.default_rng(1), count, num_variables)
+    expected = evaluate_batch(instance, configs, backend="numpy")
+    result = evaluate_batch(instance, configs, backend="bitslice")
+    assert np.array_equal(result.heights, expected.heights)
+    assert np.array_equal(result.deltas, expected.deltas)
+    assert np.array_equal(result.local_optima(True), expected.local_optima(True))
+    assert np.array_equal(result.local_optima(False), expected.local_optima(False))
+
+
+def test_bitslice_finds_the_same_optima():
+    # Every configuration of an instance with both kinds of optima
+    instance = random_instance(10, 30, 3, instance_rng(2, 0))
+    configs = ((np.arange(2 ** 10)[:, None] >> np.arange(10)) & 1).astype(bool)
+    expected = evaluate_batch(instance, configs, backend="numpy")
+    result = evaluate_batch(instance, configs, backend="bitslice")
+    assert expected.local_optima(True).any()
+    assert (expected.local_optima(False) & ~expected.local_optima(True)).any()
+    assert np.array_equal(result.local_optima(True), expected.local_optima(True))
+    assert np.array_equal(result.local_optima(False), expected.local_optima(False))
+
+
+def test_blocks_that_do_not_divide_the_batch():
+    # A budget this small gives 64-configuration blocks; 1000 leaves a last block of 40
+    instance = random_instance(70, 300, 3, instance_rng(5, 0))
+    configs = random_configurations(np.random.default_rng(3), 1000, 70)
+    expected = evaluate_batch(instance, configs, backend="numpy")
+    blocks = list(evaluate_blocks(instance, configs, memory_budget=1, backend="bitslice"))
+    assert len(blocks) == 16
+    assert np.array_equal(np.concatenate([block.heights for block in blocks]), expected.heights)
+    assert np.array_equal(np.concatenate([block.deltas for block in blocks]), expected.deltas)
+
+
+@pytest.mark.parametrize("count", [1, 2, 5, 64, 129])
+def test_sliced_sum_counts_set_bits(count):
+    words = np.random.default_rng(count).integers(0, 2 ** 63, size=(count, 3), dtype=np.uint64)
+    words[0] |= np.uint64(1 << 63)
+    planes = sliced_sum(words)
+    bits = np.unpackbits(words.view(np.uint8), axis=-1, bitorder="little").reshape(count, 3, 64)
+    weights = (1 << np.arange(planes.shape[0], dtype=np.int64))[:, None, None]
+    plane_bits = np.unpackbits(planes.view(np.uint8), axis=-1, bitorder="little").reshape(-1, 3, 64)
+    assert np.array_equal((plane_bits * weights).sum(axis=0), bits.sum(axis=0))
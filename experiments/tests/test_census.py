@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from maxsat.census import census_range, landscape_census
+from maxsat.generator import random_instance
+from maxsat.rng import instance_rng
+
+NUM_VARIABLES = 14
+
+
+def brute_force(instance):
+    # Every configuration and its n neighbors evaluated directly; bit i of the index is variable i + 1
+    masks = np.arange(2 ** instance.num_variables, dtype=np.uint64)
+    values = ((masks[:, None] >> np.arange(instance.num_variables, dtype=np.uint64)) & 1).astype(bool)
+    heights = instance.count_successful_clauses(values)
+    best = np.full(masks.size, -instance.num_clauses - 1)
+    for var in range(instance.num_variables):
+        flipped = values.copy()
+        flipped[:, var] = ~flipped[:, var]
+        best = np.maximum(best, instance.count_successful_clauses(flipped) - heights)
+    return masks, heights, best < 0, best <= 0
+
+
+@pytest.fixture(scope="module")
+def instance():
+    return random_instance(NUM_VARIABLES, 60, 3, instance_rng(11, 0))
+
+
+@pytest.fixture(scope="module")
+def expected(instance):
+    return brute_force(instance)
+
+
+@pytest.mark.parametrize("block_bits", [3, 5, 12, 14])
+def test_census_matches_brute_force(instance, expected, block_bits):
+    masks, heights, strict, non_strict = expected
+    result = landscape_census(instance, block_bits=block_bits, num_chunks=3)
+    assert result.num_configurations == masks.size
+    assert result.strict_count == np.count_nonzero(strict)
+    assert result.non_strict_count == np.count_nonzero(non_strict)
+    assert np.array_equal(result.strict_heights, np.bincount(heights[strict], minlength=instance.num_clauses + 1))
+    assert np.array_equal(result.non_strict_heights,
+                          np.bincount(heights[non_strict], minlength=instance.num_clauses + 1))
+
+    # Optima come in Gray-code order: compare them as sets of (mask, height, strict)
+    order = np.argsort(result.optima)
+    assert np.array_equal(result.optima[order], masks[non_strict])
+    assert np.array_equal(result.optima_heights[order], heights[non_strict])
+    assert np.array_equal(result.optima_strict[order], strict[non_strict])
+
+
+def test_census_range_parts_add_up(instance, expected):
+    # Uneven ranges of the 2^(14 - 5) Gray codes cover every configuration once
+    _, _, strict, non_strict = expected
+    parts = [census_range(instance, start, stop, block_bits=5) for start, stop in [(0, 1), (1, 200), (200, 512)]]
+    assert sum(part.num_configurations for part in parts) == 2 ** NUM_VARIABLES
+    assert sum(part.strict_count for part in parts) == np.count_nonzero(strict)
+    assert sum(part.non_strict_count for part in parts) == np.count_nonzero(non_strict)
@@ -0,0 +1,27 @@
+import numpy as np
+
+from maxsat.corpus import open_corpus, write_corpus
+from maxsat.dimacs import read_dimacs, read_wcnf
+
+
+def test_tautological_clauses_are_dropped(tmp_path):
+    path = tmp_path / "tautology.cnf"
+    path.write_text("p cnf 2 2\n1 -1 2 0\n-2 0\n")
+    instance = read_dimacs(path)
+    assert instance.num_clauses == 1
+    assert instance.tautologies == 1
+    # Every configuration satisfies the dropped clause
+    values = np.array([[False, False], [True, True]])
+    assert instance.count_successful_clauses(values).tolist() == [1, 0]
+
+    corpus = tmp_path / "tautology.corpus"
+    write_corpus(corpus, [instance])
+    assert open_corpus(corpus)[0].tautologies == 1
+
+
+def test_tautology_weights_are_dropped(tmp_path):
+    path = tmp_path / "tautology.wcnf"
+    path.write_text("p wcnf 2 3 10\n3 1 -1 0\n10 1 2 0\n4 -2 0\n")
+    instance, weights, top = read_wcnf(path)
+    assert instance.literals[:, 0].tolist() == [1, -2]
+    assert weights.tolist() == [10, 4]
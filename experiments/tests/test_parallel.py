@@ -0,0 +1,26 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+from maxsat.parallel import iter_units
+
+
+def square(value, poison=None, marker=None):
+    # Kills its worker for value == poison: every time, or only the first time when marker is given
+    if value == poison and (marker is None or not os.path.exists(marker)):
+        if marker is not None:
+            open(marker, "w").close()
+        os._exit(1)
+    return value * value
+
+
+def test_dead_worker_is_not_charged_to_units_in_flight(tmp_path):
+    marker = str(tmp_path / "died")
+    units = [(value, 3, marker) for value in range(8)]
+    assert list(iter_units(square, units, workers=2, retries=0)) == [value * value for value in range(8)]
+
+
+def test_unit_that_always_kills_its_worker(tmp_path):
+    units = [(value, 3) for value in range(8)]
+    results = list(iter_units(square, units, workers=2, retries=1, errors="return"))
+    assert isinstance(results[3], BrokenProcessPool)
+    assert results[:3] + results[4:] == [value * value for value in range(8) if value != 3]
@@ -0,0 +1,21 @@
+import pytest
+
+from maxsat.experiments import calculate_height_distribution, generate_instances
+from maxsat.store import ShardStore
+
+
+def test_store_without_strictly_greater_is_refused(tmp_path):
+    # Counts in a store that does not say which optima it holds cannot be resumed as either kind
+    instances = generate_instances(12, 40, 3, 1, 3)
+    store = ShardStore(tmp_path, {"seed": 3})
+    with pytest.raises(ValueError):
+        calculate_height_distribution(instances, 500, False, seed=3, store=store)
+
+
+def test_store_resumes_only_its_own_optimum_kind(tmp_path):
+    instances = generate_instances(22, 60, 3, 2, 3)
+    store = ShardStore(tmp_path, {"seed": 3, "strictly_greater": False})
+    first = calculate_height_distribution(instances, 4000, False, seed=3, store=store)
+    assert (calculate_height_distribution(instances, 4000, False, seed=3, store=store) == first).all()
+    with pytest.raises(ValueError):
+        calculate_height_distribution(instances, 4000, True, seed=3, store=store)
@@ -0,0 +1,28 @@
+import json
+
+from maxsat.cli import main
+
+
+def run_cli(tmp_path, name, *argv):
+    output = tmp_path / f"{name}.json"
+    assert main([*argv, "-q", "-o", str(output)]) == 0
+    return json.loads(output.read_text())
+
+
+def test_exp2_sweep_matches_cli(tmp_path):
+    flags = ["-n", "20", "-m", "80", "-i", "2", "-N", "4000", "--chunk-size", "2000", "--seed", "1", "-w", "1"]
+    cli = run_cli(tmp_path, "cli", "exp2", *flags)
+    sweep = run_cli(tmp_path, "sweep", "sweep", str(tmp_path / "exp2.db"), "exp2", *flags)
+    point, = sweep["points"]
+    assert point["total_local_optima"] == cli["total_local_optima"]
+    assert point["height_counts"] == cli["height_counts"]
+
+
+def test_exp6_sweep_matches_cli(tmp_path):
+    flags = ["-n", "30", "-m", "200", "-i", "2", "-N", "3000", "--seed", "1", "-w", "1"]
+    cli = run_cli(tmp_path, "cli", "exp6", *flags)
+    sweep = run_cli(tmp_path, "sweep", "sweep", str(tmp_path / "exp6.db"), "exp6", *flags)
+    point, = sweep["points"]
+    assert point["distance_stats"] == cli["distance_stats"]
+    assert cli["distance_stats"]
+    assert all(row["count"] == sum(row["histogram"]) for row in cli["distance_stats"])